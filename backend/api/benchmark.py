@@ -0,0 +1,196 @@
+from io import StringIO
+from itertools import islice
+from math import gcd
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Max
+from django.db.transaction import atomic
+from payments.models import CartIngredient, ShopingCart
+from recipes.models import AmountIngredient, Favorite, Ingredient, Recipe, Tag
+from users.models import Follow
+
+User = get_user_model()
+
+BENCHMARK_PREFIX = "benchmark"
+
+
+def get_benchmark_user():
+    """
+    Функция получения пользователя, от имени которого выполняются замеры:
+    первого созданного seed_data, если его нет - первого пользователя.
+    """
+    user = (
+        User.objects.filter(username__startswith=BENCHMARK_PREFIX)
+        .order_by("id")
+        .first()
+    )
+    if user is None:
+        user = User.objects.order_by("id").first()
+    return user
+
+
+def batched(objects, batch_size):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_create(model, objects, batch_size):
+    for batch in batched(objects, batch_size):
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def spread_pairs(count, left_size, right_size, skip_equal=False):
+    """
+    Генератор уникальных пар (left, right), равномерно распределенных
+    по обоим множествам: индексы пар идут с шагом, взаимно простым
+    с их общим количеством.
+    """
+    total = left_size * right_size
+    step = total // 2 + 1
+    while gcd(step, total) != 1:
+        step += 1
+    created = 0
+    for position in range(total):
+        if created >= count:
+            return
+        left, right = divmod(position * step % total, right_size)
+        if skip_equal and left == right:
+            continue
+        created += 1
+        yield left, right
+
+
+@atomic
+def seed_data(
+    users=1000,
+    recipes=10000,
+    favorites=100000,
+    follows=10000,
+    ingredients_per_recipe=5,
+    cart_recipes=50,
+    batch_size=5000,
+):
+    """
+    Функция наполнения базы данных для замеров производительности.
+    Создает пользователей, теги, рецепты с ингредиентами, избранное,
+    подписки и корзину покупок первого созданного пользователя.
+    Ингредиенты должны быть загружены заранее командой load_ingredients.
+    """
+    ingredient_ids = list(Ingredient.objects.values_list("id", flat=True))
+    if not ingredient_ids:
+        raise ValueError("Сначала загрузите ингредиенты: load_ingredients.")
+
+    bulk_create(
+        User,
+        (
+            User(
+                username=f"{BENCHMARK_PREFIX}{number}",
+                email=f"{BENCHMARK_PREFIX}{number}@example.com",
+                first_name="Benchmark",
+                last_name=str(number),
+            )
+            for number in range(users)
+        ),
+        batch_size,
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=BENCHMARK_PREFIX)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    bulk_create(
+        Tag,
+        (
+            Tag(
+                name=f"{BENCHMARK_PREFIX}{number}",
+                color=f"#BE{number:04d}",
+                slug=f"{BENCHMARK_PREFIX}{number}",
+            )
+            for number in range(3)
+        ),
+        batch_size,
+    )
+    tag_ids = list(
+        Tag.objects.filter(slug__startswith=BENCHMARK_PREFIX).values_list(
+            "id", flat=True
+        )
+    )
+
+    last_recipe_id = Recipe.objects.aggregate(Max("id"))["id__max"] or 0
+    bulk_create(
+        Recipe,
+        (
+            Recipe(
+                author_id=user_ids[number % len(user_ids)],
+                name=f"{BENCHMARK_PREFIX} {number}",
+                text="Описание рецепта. " * 20,
+                cooking_time=number % 120 + 1,
+            )
+            for number in range(recipes)
+        ),
+        batch_size,
+    )
+    recipe_ids = list(
+        Recipe.objects.filter(id__gt=last_recipe_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    Through = Recipe.tags.through
+    bulk_create(
+        Through,
+        (
+            Through(recipe_id=recipe_id, tag_id=tag_ids[number % len(tag_ids)])
+            for number, recipe_id in enumerate(recipe_ids)
+        ),
+        batch_size,
+    )
+    bulk_create(
+        AmountIngredient,
+        (
+            AmountIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_ids[
+                    (number * ingredients_per_recipe + offset)
+                    % len(ingredient_ids)
+                ],
+                amount=offset + 1,
+            )
+            for number, recipe_id in enumerate(recipe_ids)
+            for offset in range(ingredients_per_recipe)
+        ),
+        batch_size,
+    )
+    bulk_create(
+        Favorite,
+        (
+            Favorite(user_id=user_ids[left], recipe_id=recipe_ids[right])
+            for left, right in spread_pairs(
+                favorites, len(user_ids), len(recipe_ids)
+            )
+        ),
+        batch_size,
+    )
+    bulk_create(
+        Follow,
+        (
+            Follow(follower_id=user_ids[left], following_id=user_ids[right])
+            for left, right in spread_pairs(
+                follows, len(user_ids), len(user_ids), skip_equal=True
+            )
+        ),
+        batch_size,
+    )
+
+    cart, _ = ShopingCart.objects.get_or_create(user_id=user_ids[0])
+    cart.recipes.add(*recipe_ids[:cart_recipes])
+    CartIngredient.objects.refresh((cart,))
+    call_command("reconcile_counters", stdout=StringIO())
+    call_command("refresh_recipe_scores", stdout=StringIO())
+    return User.objects.get(id=user_ids[0])
@@ -1,4 +1,9 @@
 from core.models import filters
+from django.conf import settings
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .search import ingredient_index
 
 
 class RecipeFilter(filters.FilterClass):
@@ -14,3 +19,19 @@ class RecipeFilter(filters.FilterClass):
     class Meta:
         fields = ("author", "tags", "is_favorited", "is_in_shopping_cart")
         many_to_many_fields = ("tags__slug__in",)
+
+
+class IngredientSearchFilter(BaseFilterBackend):
+    """
+    Фильтр автодополнения ингредиентов по названию.
+    Сначала выводятся ингредиенты, название которых начинается с запроса,
+    затем содержащие его. Количество результатов ограничено.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(api_settings.SEARCH_PARAM)
+        if not query or view.action != "list":
+            return queryset
+        return ingredient_index.search(
+            query, settings.INGREDIENT_SEARCH_LIMIT
+        )
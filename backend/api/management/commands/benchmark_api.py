@@ -0,0 +1,216 @@
+import json
+from itertools import combinations
+from math import ceil
+from time import perf_counter
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Ingredient, Recipe, Tag
+from rest_framework.test import APIClient
+
+from ...benchmark import BENCHMARK_PREFIX, get_benchmark_user, seed_data
+
+IMAGE = (
+    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAAD"
+    "UlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+CREATED_RECIPE_NAME = f"{BENCHMARK_PREFIX} api"
+
+
+def percentile(values, percent):
+    """Функция вычисления перцентиля методом ближайшего ранга."""
+    values = sorted(values)
+    return values[max(ceil(len(values) * percent / 100) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время ответа и количество SQL-запросов основных "
+        "эндпоинтов API, вызывая их внутри процесса: списка рецептов "
+        "со всеми комбинациями фильтров, рецепта, создания и изменения "
+        "рецепта, подписок и скачивания списка покупок. "
+        "Сравнивает результаты с сохраненными в --baseline и завершается "
+        "с ошибкой при ухудшении. С параметром --seed предварительно "
+        "наполняет базу данными для замеров."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", action="store_true")
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--recipes", type=int, default=100000)
+        parser.add_argument("--favorites", type=int, default=1000000)
+        parser.add_argument("--follows", type=int, default=1000000)
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--baseline", help="Файл с базовыми замерами.")
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Сохранить замеры в файл --baseline.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Допустимое относительное увеличение времени ответа.",
+        )
+
+    def seed(self, options):
+        if not Ingredient.objects.exists():
+            call_command("load_ingredients", stdout=self.stdout)
+        return seed_data(
+            users=options["users"],
+            recipes=options["recipes"],
+            favorites=options["favorites"],
+            follows=options["follows"],
+        )
+
+    def measure(self, make_request, iterations, warmup):
+        """
+        Метод замера запроса: возвращает время ответа в миллисекундах
+        (p50, p99) и наибольшее количество SQL-запросов.
+        """
+        durations = []
+        queries = 0
+        for iteration in range(warmup + iterations):
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = make_request()
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                duration = perf_counter() - start
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"Ответ {response.status_code}: {response.content[:200]}"
+                )
+            if iteration >= warmup:
+                durations.append(duration * 1000)
+                queries = max(queries, len(context.captured_queries))
+        return {
+            "p50": round(percentile(durations, 50), 2),
+            "p99": round(percentile(durations, 99), 2),
+            "queries": queries,
+        }
+
+    def get_scenarios(self, client, user):
+        filters = {
+            "author": user.id,
+            "tags": list(
+                Tag.objects.order_by("id").values_list("slug", flat=True)[:2]
+            ),
+            "is_favorited": 1,
+            "is_in_shopping_cart": 1,
+        }
+        for size in range(len(filters) + 1):
+            for names in combinations(filters, size):
+                params = {name: filters[name] for name in names}
+                yield (
+                    "list" + "".join(f" {name}" for name in names),
+                    lambda params=params: client.get("/api/recipes/", params),
+                )
+
+        recipe_id = Recipe.objects.values_list("id", flat=True).first()
+        yield "retrieve", lambda: client.get(f"/api/recipes/{recipe_id}/")
+
+        payload = {
+            "name": CREATED_RECIPE_NAME,
+            "text": "Описание рецепта.",
+            "cooking_time": 10,
+            "image": IMAGE,
+            "tags": list(Tag.objects.values_list("id", flat=True)[:2]),
+            "ingredients": [
+                {"id": ingredient_id, "amount": 10}
+                for ingredient_id in Ingredient.objects.values_list(
+                    "id", flat=True
+                )[:5]
+            ],
+        }
+        yield "create", lambda: client.post(
+            "/api/recipes/", payload, format="json"
+        )
+
+        created_id = None
+
+        def update():
+            nonlocal created_id
+            if created_id is None:
+                created_id = client.post(
+                    "/api/recipes/", payload, format="json"
+                ).data["id"]
+            payload["ingredients"][0]["amount"] += 1
+            return client.patch(
+                f"/api/recipes/{created_id}/", payload, format="json"
+            )
+
+        yield "update", update
+        yield "subscriptions", lambda: client.get(
+            "/api/users/subscriptions/", {"recipes_limit": 3}
+        )
+        yield "download", lambda: client.get(
+            "/api/recipes/download_shopping_cart/"
+        )
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for name, result in results.items():
+            expected = baseline.get(name)
+            if expected is None:
+                continue
+            if result["queries"] > expected["queries"]:
+                regressions.append(
+                    f"{name}: запросов {result['queries']} "
+                    f"> {expected['queries']}"
+                )
+            for metric in ("p50", "p99"):
+                limit = expected[metric] * (1 + tolerance)
+                if result[metric] > limit:
+                    regressions.append(
+                        f"{name}: {metric} {result[metric]} мс "
+                        f"> {expected[metric]} мс"
+                    )
+        return regressions
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("Укажите файл --baseline.")
+        user = self.seed(options) if options["seed"] else get_benchmark_user()
+        if user is None:
+            raise CommandError("Нет данных для замеров, используйте --seed.")
+
+        client = APIClient()
+        client.force_authenticate(user)
+        results = {}
+        try:
+            for name, make_request in self.get_scenarios(client, user):
+                results[name] = self.measure(
+                    make_request, options["iterations"], options["warmup"]
+                )
+                self.stdout.write(
+                    f"{name:<50} p50 {results[name]['p50']:>8} мс  "
+                    f"p99 {results[name]['p99']:>8} мс  "
+                    f"запросов {results[name]['queries']}"
+                )
+        finally:
+            for recipe in Recipe.objects.filter(name=CREATED_RECIPE_NAME):
+                client.delete(f"/api/recipes/{recipe.id}/")
+
+        if options["save_baseline"]:
+            with open(options["baseline"], "w", encoding="utf-8") as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f"Замеры сохранены: {options['baseline']}")
+            )
+            return
+        if not options["baseline"]:
+            return
+
+        with open(options["baseline"], encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = self.compare(results, baseline, options["tolerance"])
+        if regressions:
+            raise CommandError(
+                "Ухудшение производительности:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("Ухудшений нет."))
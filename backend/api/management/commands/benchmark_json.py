@@ -0,0 +1,151 @@
+import base64
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import BytesIO
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ...parsers import ORJSONParser
+from ...renderers import ORJSONRenderer, orjson
+
+
+def make_recipes(count, text_size):
+    """Функция построения списка рецептов в формате ответа API."""
+    now = datetime.now()
+    return [
+        {
+            "id": number,
+            "tags": [
+                {
+                    "id": tag,
+                    "name": f"Тег {tag}",
+                    "color": "#E26C2D",
+                    "slug": f"tag{tag}",
+                }
+                for tag in range(2)
+            ],
+            "ingredients": [
+                {
+                    "id": ingredient,
+                    "name": f"Ингредиент {ingredient}",
+                    "measurement_unit": "г",
+                    "amount": 12.5,
+                }
+                for ingredient in range(8)
+            ],
+            "author": {
+                "email": f"user{number}@example.com",
+                "id": number,
+                "username": f"user{number}",
+                "first_name": "Имя",
+                "last_name": "Фамилия",
+                "is_subscribed": False,
+            },
+            "is_favorited": bool(number % 2),
+            "is_in_shopping_cart": False,
+            "name": f"Рецепт {number}",
+            "image": f"http://localhost/media/recipes/{number:064x}.webp",
+            "text": ("Описание рецепта. " * text_size)[:text_size],
+            "cooking_time": number % 120 + 1,
+            "pub_date": (now - timedelta(minutes=number)).isoformat(),
+        }
+        for number in range(count)
+    ]
+
+
+SPECIAL_VALUES = {
+    "datetime": datetime(2023, 1, 2, 3, 4, 5, 678901),
+    "date": datetime(2023, 1, 2).date(),
+    "timedelta": timedelta(hours=1),
+    "decimal": Decimal("12.50"),
+    "lazy": gettext_lazy("Рецепт"),
+    1: "Ключ-число",
+    "separators": "\u2028\u2029",
+}
+
+
+def make_recipe_payload(image_size):
+    """Функция построения тела запроса создания рецепта с изображением."""
+    image = base64.b64encode(os.urandom(image_size)).decode()
+    return JSONRenderer().render(
+        {
+            "ingredients": [
+                {"id": ingredient, "amount": 10} for ingredient in range(8)
+            ],
+            "tags": [1, 2],
+            "image": f"data:image/png;base64,{image}",
+            "name": "Рецепт",
+            "text": "Описание рецепта. " * 100,
+            "cooking_time": 10,
+        }
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает скорость рендеринга списка рецептов и разбора тела "
+        "запроса создания рецепта стандартными JSONRenderer и JSONParser "
+        "DRF и используемыми в API ORJSONRenderer и ORJSONParser."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=100)
+        parser.add_argument("--text-size", type=int, default=2000)
+        parser.add_argument("--image-size", type=int, default=1024 * 1024)
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def measure(self, function, iterations):
+        function()
+        start = perf_counter()
+        for _ in range(iterations):
+            function()
+        return (perf_counter() - start) / iterations * 1000
+
+    def compare(self, title, default, fast, iterations):
+        default_time = self.measure(default, iterations)
+        fast_time = self.measure(fast, iterations)
+        self.stdout.write(
+            f"{title}: DRF {default_time:.2f} мс, "
+            f"orjson {fast_time:.2f} мс, "
+            f"ускорение {default_time / fast_time:.1f}x"
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson не установлен.")
+        iterations = options["iterations"]
+
+        recipes = {
+            "count": options["recipes"],
+            "next": None,
+            "previous": None,
+            "results": make_recipes(options["recipes"], options["text_size"]),
+        }
+        default_renderer, fast_renderer = JSONRenderer(), ORJSONRenderer()
+        for data in (SPECIAL_VALUES, recipes):
+            if default_renderer.render(data) != fast_renderer.render(data):
+                raise CommandError("Результаты рендеринга различаются.")
+        self.compare(
+            f"Рендеринг {options['recipes']} рецептов",
+            lambda: default_renderer.render(recipes),
+            lambda: fast_renderer.render(recipes),
+            iterations,
+        )
+
+        payload = make_recipe_payload(options["image_size"])
+        default_parser, fast_parser = JSONParser(), ORJSONParser()
+        if default_parser.parse(BytesIO(payload)) != fast_parser.parse(
+            BytesIO(payload)
+        ):
+            raise CommandError("Результаты разбора различаются.")
+        self.compare(
+            f"Разбор рецепта с изображением {len(payload)} байт",
+            lambda: default_parser.parse(BytesIO(payload)),
+            lambda: fast_parser.parse(BytesIO(payload)),
+            iterations,
+        )
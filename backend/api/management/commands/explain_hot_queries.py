@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from payments.models import ShopingCart
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ...benchmark import BENCHMARK_PREFIX, get_benchmark_user, seed_data
+from ...views import RecipeViewSet, UserViewSet
+
+
+def get_view_queryset(viewset, user, action, query_params=None):
+    """Функция получения queryset вьюсета так, как он строится в запросе."""
+    request = Request(APIRequestFactory().get("/", query_params))
+    request.user = user
+    view = viewset(request=request, action=action, format_kwarg=None)
+    return view.filter_queryset(view.get_queryset())
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит планы выполнения основных запросов API: списка рецептов "
+        "с фильтрами, подписок и списка покупок. С параметром --seed "
+        "предварительно наполняет базу данными для замеров."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", action="store_true")
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--recipes", type=int, default=100000)
+        parser.add_argument("--favorites", type=int, default=1000000)
+        parser.add_argument("--follows", type=int, default=100000)
+
+    def explain(self, title, queryset):
+        options = {}
+        if connection.vendor == "postgresql":
+            options = {"analyze": True, "buffers": True}
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(queryset.explain(**options) + "\n")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            user = seed_data(
+                users=options["users"],
+                recipes=options["recipes"],
+                favorites=options["favorites"],
+                follows=options["follows"],
+            )
+        else:
+            user = get_benchmark_user()
+
+        tags = [f"{BENCHMARK_PREFIX}0", f"{BENCHMARK_PREFIX}1"]
+        for title, query_params in (
+            ("Список рецептов", None),
+            ("Список рецептов: избранное", {"is_favorited": 1}),
+            ("Список рецептов: корзина", {"is_in_shopping_cart": 1}),
+            ("Список рецептов: автор", {"author": user.id}),
+            ("Список рецептов: теги", {"tags": tags}),
+        ):
+            queryset = get_view_queryset(
+                RecipeViewSet, user, "list", query_params
+            )
+            self.explain(title, queryset[:6])
+
+        queryset = get_view_queryset(UserViewSet, user, "subscriptions")
+        self.explain("Подписки", queryset[:6])
+
+        cart = ShopingCart.objects.filter(user=user).first()
+        if cart is not None:
+            self.explain("Список покупок", cart.make_file_content())
@@ -1,6 +1,15 @@
+from contextlib import nullcontext
+from hashlib import sha1
+
+from core.cache import get_cache_version
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
 
 
 class MixinPassValidation:
@@ -12,3 +21,125 @@ class MixinPassValidation:
             validate_password(password_value, user)
         except django_exceptions.ValidationError as e:
             raise ValidationError({password_field: list(e.messages)})
+
+
+class MixinSubscriptionResolver:
+    """
+    Миксин, предоставляющий метод получения подписок текущего пользователя.
+    Подписки загружаются одним запросом и кэшируются на объекте request.
+    """
+
+    @staticmethod
+    def get_following_ids(request):
+        following_ids = getattr(request, "_following_ids", None)
+        if following_ids is None:
+            following_ids = set()
+            if request.user.is_authenticated:
+                following_ids = set(
+                    request.user.follows.values_list(
+                        "following_id", flat=True
+                    )
+                )
+            request._following_ids = following_ids
+        return following_ids
+
+
+class MixinRepresentationMemo:
+    """
+    Миксин сериализатора, запоминающий представления объектов.
+    Представление каждого объекта строится один раз за ответ
+    и переиспользуется: память хранится в контексте корневого
+    сериализатора, общем для всех вложенных.
+    """
+
+    memo_context_key = "representations"
+
+    def get_memo(self):
+        return self.context.setdefault(self.memo_context_key, {})
+
+    def to_representation(self, instance):
+        memo = self.get_memo()
+        key = (type(self), instance.pk)
+        representation = memo.get(key)
+        if representation is None:
+            representation = memo[key] = super().to_representation(instance)
+        return representation
+
+
+def measure_serialization(context):
+    """
+    Функция учета времени сериализации в метриках запроса из контекста.
+    Без запроса или метрик время не учитывается.
+    """
+    metrics = getattr(context.get("request"), "metrics", None)
+    if metrics is None:
+        return nullcontext()
+    return metrics.measure_serialization()
+
+
+class MixinSerializerTiming:
+    """
+    Миксин сериализатора, учитывающий время построения data
+    в метриках запроса отдельно от времени кода представления.
+    """
+
+    @property
+    def data(self):
+        with measure_serialization(self.context):
+            return super().data
+
+
+class TimedListSerializer(MixinSerializerTiming, ListSerializer):
+    """
+    Сериализатор списка, учитывающий время построения data
+    в метриках запроса.
+    """
+
+    pass
+
+
+class MixinCachedList:
+    """
+    Миксин, кэширующий отрендеренный ответ метода list.
+    Кэш версионируется по модели queryset и сбрасывается при ее изменении,
+    ключ учитывает адрес запроса и выбранный тип ответа с параметрами.
+    Ответ содержит ETag, при совпадении If-None-Match отдается 304
+    без обращения к базе данных и сериализатору.
+    """
+
+    def get_list_cache_key(self, request):
+        version = get_cache_version(self.queryset.model._meta.label_lower)
+        variant = sha1(
+            f"{request.accepted_media_type}:{request.get_full_path()}".encode()
+        ).hexdigest()
+        return f"response:{version}:{variant}"
+
+    def get_cached_list(self, request, *args, **kwargs):
+        cache_key = self.get_list_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            content = request.accepted_renderer.render(
+                response.data,
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+            etag = f'"{sha1(content).hexdigest()}"'
+            cached = (etag, request.accepted_media_type, content)
+            cache.set(cache_key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+        return cached
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        etag, content_type, content = self.get_cached_list(
+            request, *args, **kwargs
+        )
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        return response
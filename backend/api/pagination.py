@@ -0,0 +1,121 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class RecipeKeysetPagination(BasePagination):
+    """
+    Курсорная пагинация рецептов по ключу (pub_date, id) или по ключу
+    сортировки представления, например (score__popular, score__recipe_id).
+    Следующая страница выбирается условием по ключу последнего рецепта,
+    поэтому ее стоимость не зависит от глубины.
+    Количество рецептов считается только по параметру count:
+    count=exact - точно, count=estimate - по оценке планировщика.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    page_size = api_settings.PAGE_SIZE
+    key = (("pub_date", datetime.fromisoformat), ("id", int))
+    invalid_cursor_message = "Неверный курсор."
+
+    def get_key(self, view):
+        """
+        Метод получения ключа сортировки: пар (поле, функция разбора
+        значения из курсора). Представление может задать свой ключ
+        методом get_ordering_key.
+        """
+        get_ordering_key = getattr(view, "get_ordering_key", None)
+        return (get_ordering_key and get_ordering_key()) or self.key
+
+    @staticmethod
+    def get_key_value(recipe, field):
+        value = recipe
+        for name in field.split("__"):
+            value = getattr(value, name)
+        return value
+
+    def encode_cursor(self, recipe):
+        position = ",".join(
+            str(self.get_key_value(recipe, field)) for field, _ in self.key
+        )
+        return urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = urlsafe_b64decode(encoded).decode().split(",")
+            if len(values) != len(self.key):
+                raise ValueError
+            return [
+                parse(value) for (_, parse), value in zip(self.key, values)
+            ]
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def estimate_count(queryset):
+        if connection.vendor != "postgresql":
+            return queryset.count()
+        plan = json.loads(queryset.explain(format="json"))
+        return plan[0]["Plan"]["Plan Rows"]
+
+    def get_count(self, queryset, request):
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == "exact":
+            return queryset.count()
+        if count_mode == "estimate":
+            return self.estimate_count(queryset)
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.key = self.get_key(view)
+        self.count = self.get_count(queryset, request)
+
+        (first_field, _), (second_field, _) = self.key
+        queryset = queryset.order_by(f"-{first_field}", f"-{second_field}")
+        position = self.decode_cursor(request)
+        if position is not None:
+            first, second = position
+            queryset = queryset.filter(
+                Q(**{f"{first_field}__lt": first})
+                | Q(**{first_field: first, f"{second_field}__lt": second}),
+                **{f"{first_field}__lte": first},
+            )
+
+        page = list(queryset[: self.page_size + 1])
+        self.next_recipe = None
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            self.next_recipe = page[-1]
+        return page
+
+    def get_next_link(self):
+        if self.next_recipe is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_recipe),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "next": self.get_next_link(),
+                "results": data,
+            }
+        )
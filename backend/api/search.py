@@ -0,0 +1,50 @@
+from bisect import bisect_left
+
+from core.cache import get_cache_version
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения по названию.
+    Названия хранятся отсортированными, совпадения по началу названия
+    находятся бинарным поиском и выводятся раньше совпадений по подстроке.
+    Индекс перестраивается при смене версии кэша модели Ingredient.
+    """
+
+    def __init__(self):
+        self._state = (None, (), ())
+
+    def get_state(self):
+        version = get_cache_version(Ingredient._meta.label_lower)
+        if self._state[0] != version:
+            ingredients = sorted(
+                Ingredient.objects.all(),
+                key=lambda ingredient: ingredient.name.lower(),
+            )
+            names = tuple(
+                ingredient.name.lower() for ingredient in ingredients
+            )
+            self._state = (version, names, tuple(ingredients))
+        return self._state
+
+    def search(self, query: str, limit: int) -> list:
+        _, names, ingredients = self.get_state()
+        query = query.lower()
+
+        start = end = bisect_left(names, query)
+        while end < len(names) and end - start < limit:
+            if not names[end].startswith(query):
+                break
+            end += 1
+        result = list(ingredients[start:end])
+
+        for position, name in enumerate(names):
+            if len(result) >= limit:
+                break
+            if query in name and not start <= position < end:
+                result.append(ingredients[position])
+        return result
+
+
+ingredient_index = IngredientIndex()
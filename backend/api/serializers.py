@@ -1,21 +1,47 @@
 import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.files.base import File
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.db.transaction import atomic
-from django.http import Http404
-from django.shortcuts import get_object_or_404
-from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from django.utils.functional import cached_property
+from payments.models import CartIngredient
+from recipes.images import (
+    get_recipe_files,
+    release_files,
+    schedule_thumbnail,
+)
+from recipes.models import (
+    AmountIngredient,
+    Ingredient,
+    Recipe,
+    Tag,
+)
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from .mixins import MixinPassValidation
+from .mixins import (
+    MixinPassValidation,
+    MixinRepresentationMemo,
+    MixinSerializerTiming,
+    MixinSubscriptionResolver,
+    TimedListSerializer,
+    measure_serialization,
+)
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(
+    MixinSerializerTiming,
+    MixinRepresentationMemo,
+    MixinSubscriptionResolver,
+    serializers.ModelSerializer,
+):
     """
     Сериализатор модели User.
     Предназначен для вывода информации о пользователях.
@@ -33,15 +59,12 @@ class UserSerializer(serializers.ModelSerializer):
             "last_name",
             "is_subscribed",
         )
+        list_serializer_class = TimedListSerializer
 
     def get_is_subscribed(self, obj):
-        user = self.context["request"].user
-
-        if not user.is_authenticated:
-            return False
-
-        user_follow = user.follows.filter(following=obj)
-        return user_follow.exists()
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+        return obj.id in self.get_following_ids(self.context["request"])
 
 
 class UserRegistrationSerializer(
@@ -90,26 +113,97 @@ class SetPasswordSerializer(MixinPassValidation, serializers.Serializer):
         return value
 
 
+class Base64ImageField(serializers.ImageField):
+    """
+    Поле изображения, принимающее его в виде data URL в base64.
+    Пробелы и переводы строк base64 с переносами (RFC 2045) удаляются.
+    Размер изображения проверяется по длине строки до декодирования,
+    строка декодируется частями во временный файл.
+    """
+
+    default_error_messages = {
+        **serializers.ImageField.default_error_messages,
+        "too_large": "Размер изображения не должен превышать {max_size} байт.",
+        "invalid_base64": "Изображение должно быть закодировано в base64.",
+    }
+    chunk_size = 64 * 1024
+
+    def decode(self, imgstr, ext):
+        file = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        for start in range(0, len(imgstr), self.chunk_size):
+            chunk = imgstr[start:start + self.chunk_size]
+            try:
+                file.write(base64.b64decode(chunk, validate=True))
+            except binascii.Error:
+                file.close()
+                self.fail("invalid_base64")
+        file.seek(0)
+        return File(file, name="temp." + ext)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith("data:image"):
+            format, imgstr = data.split(";base64,")
+            ext = format.split("/")[-1]
+            imgstr = "".join(imgstr.split())
+            if len(imgstr) // 4 * 3 > settings.MAX_IMAGE_SIZE:
+                self.fail("too_large", max_size=settings.MAX_IMAGE_SIZE)
+            data = self.decode(imgstr, ext)
+        return super().to_internal_value(data)
+
+
+class ThumbnailImageField(serializers.ImageField):
+    """
+    Поле изображения рецепта для списков.
+    Выводит уменьшенную копию, пока она не готова - оригинал.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("read_only", True)
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance.thumbnail or instance.image
+
+
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор модели Recipe.
     Предназначен для вывода неполной информации о рецептах.
     """
 
+    image = ThumbnailImageField()
+
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
 
 
-class FollowSerializer(serializers.ModelSerializer):
+class FollowListSerializer(TimedListSerializer):
+    """
+    Сериализатор списка подписок.
+    Загружает рецепты всех авторов списка одним запросом.
+    """
+
+    def to_representation(self, data):
+        users = list(data)
+        self.child.attach_recipes(users)
+        return super().to_representation(users)
+
+
+class FollowSerializer(MixinSerializerTiming, serializers.ModelSerializer):
     """
     Сериализатор модели User.
     Предназначен для вывода информации о пользователях и их рецептах,
     на которых подписан текущий авторизованный пользователь.
+    Количество рецептов каждого автора ограничивается
+    параметром запроса recipes_limit.
     """
 
     is_subscribed = serializers.BooleanField(default=True)
-    recipes = ShortRecipeSerializer(many=True)
+    recipes = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
@@ -121,10 +215,84 @@ class FollowSerializer(serializers.ModelSerializer):
             "last_name",
             "is_subscribed",
             "recipes",
+            "recipes_count",
+        )
+        list_serializer_class = FollowListSerializer
+
+    @staticmethod
+    def get_authors_recipes(author_ids, limit=None):
+        """
+        Метод получения рецептов авторов одним запросом.
+        При заданном limit у каждого автора выбираются limit последних
+        рецептов оконной функцией ROW_NUMBER() OVER (PARTITION BY author).
+        """
+        recipes = (
+            Recipe.objects.filter(author__in=author_ids)
+            .only("id", "author", "name", "image", "thumbnail", "cooking_time")
+            .order_by("-pub_date", "-id")
         )
+        if limit is None:
+            return recipes
+
+        ranked = recipes.annotate(
+            recipe_rank=Window(
+                expression=RowNumber(),
+                partition_by=F("author"),
+                order_by=(F("pub_date").desc(), F("id").desc()),
+            )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        return Recipe.objects.raw(
+            f"SELECT * FROM ({sql}) ranked_recipes "
+            "WHERE recipe_rank <= %s ORDER BY recipe_rank",
+            (*params, limit),
+        )
+
+    def get_recipes_limit(self):
+        request = self.context.get("request")
+        try:
+            limit = int(request.query_params["recipes_limit"])
+        except (AttributeError, KeyError, ValueError):
+            return None
+        return max(limit, 0)
+
+    def attach_recipes(self, users):
+        """Метод загрузки рецептов для списка пользователей."""
+        authors_recipes = {user.id: [] for user in users}
+        for recipe in self.get_authors_recipes(
+            authors_recipes, self.get_recipes_limit()
+        ):
+            authors_recipes[recipe.author_id].append(recipe)
+        for user in users:
+            user.limited_recipes = authors_recipes[user.id]
+
+    def get_recipes(self, obj):
+        if not hasattr(obj, "limited_recipes"):
+            self.attach_recipes((obj,))
+        return ShortRecipeSerializer(
+            obj.limited_recipes, many=True, context=self.context
+        ).data
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    """
+    Сериализатор списка id объектов.
+    Предназначен для пакетного добавления рецептов в избранное,
+    в корзину покупок и подписки на пользователей.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.BULK_IDS_LIMIT,
+    )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(
+    MixinSerializerTiming,
+    MixinRepresentationMemo,
+    serializers.ModelSerializer,
+):
     """
     Сериализатор модели Tag.
     Предназначен для вывода информации о тегах.
@@ -134,9 +302,14 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ("id", "name", "color", "slug")
         read_only_fields = ("name", "color", "slug")
+        list_serializer_class = TimedListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    MixinSerializerTiming,
+    MixinRepresentationMemo,
+    serializers.ModelSerializer,
+):
     """
     Сериализатор для модели Ingredient.
     Предназначен для вывода информации об ингредиентах.
@@ -146,6 +319,7 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ("id", "name", "measurement_unit")
         read_only_fields = ("name", "measurement_unit")
+        list_serializer_class = TimedListSerializer
 
 
 class AmountIngredientSerializer(serializers.Serializer):
@@ -158,13 +332,6 @@ class AmountIngredientSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     amount = serializers.FloatField()
 
-    def validate_id(self, value):
-        try:
-            get_object_or_404(Ingredient, id=value)
-        except Http404:
-            raise ValidationError({"errors": "Такого ингредиента нет!"})
-        return value
-
     def validate_amount(self, value):
         if value < settings.MIN_VALUE_AMOUNT:
             raise ValidationError(
@@ -173,16 +340,9 @@ class AmountIngredientSerializer(serializers.Serializer):
         return value
 
 
-class Base64ImageField(serializers.ImageField):
-    def to_internal_value(self, data):
-        if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
-        return super().to_internal_value(data)
-
-
-class RecipeListOrRetrieveSerializer(serializers.ModelSerializer):
+class RecipeListOrRetrieveSerializer(
+    MixinSerializerTiming, serializers.ModelSerializer
+):
     """
     Сериализатор модели Recipe.
     Предназначен для вывода информации о рецептах.
@@ -209,20 +369,161 @@ class RecipeListOrRetrieveSerializer(serializers.ModelSerializer):
             "cooking_time",
             "pub_date",
         )
+        list_serializer_class = TimedListSerializer
+
+    @cached_property
+    def ingredient_serializer(self):
+        return IngredientSerializer(context=self.context)
 
     def get_ingredients(self, obj):
         ingredients = []
         for ingredient in obj.ingredients.all():
             ingredient_json = {
-                "id": ingredient.ingredient.id,
-                "name": ingredient.ingredient.name,
-                "measurement_unit": ingredient.ingredient.measurement_unit,
+                **self.ingredient_serializer.to_representation(
+                    ingredient.ingredient
+                ),
                 "amount": ingredient.amount,
             }
             ingredients.append(ingredient_json)
         return ingredients
 
 
+class RecipeListSerializer(RecipeListOrRetrieveSerializer):
+    """
+    Сериализатор модели Recipe.
+    Предназначен для вывода списков рецептов с уменьшенными изображениями.
+    """
+
+    image = ThumbnailImageField()
+
+
+class RecipeListFastSerializer(MixinSubscriptionResolver):
+    """
+    Быстрый сериализатор списка рецептов.
+    Строит тот же вывод, что и RecipeListSerializer, напрямую из
+    словарей queryset.values(fields) с полями авторов и словарей
+    тегов и ингредиентов, загруженных по одному запросу.
+    """
+
+    fields = (
+        "id",
+        "author_id",
+        "author__email",
+        "author__username",
+        "author__first_name",
+        "author__last_name",
+        "is_favorited",
+        "is_in_shopping_cart",
+        "name",
+        "image",
+        "thumbnail",
+        "text",
+        "cooking_time",
+        "pub_date",
+    )
+    pub_date_field = serializers.DateTimeField()
+
+    def __init__(self, recipes, context):
+        self.recipes = recipes
+        self.context = context
+        self.storage = Recipe._meta.get_field("image").storage
+
+    def get_author(self, recipe, following_ids):
+        return {
+            "email": recipe["author__email"],
+            "id": recipe["author_id"],
+            "username": recipe["author__username"],
+            "first_name": recipe["author__first_name"],
+            "last_name": recipe["author__last_name"],
+            "is_subscribed": recipe["author_id"] in following_ids,
+        }
+
+    @staticmethod
+    def get_tags(recipe_ids):
+        recipes_tags = {id: [] for id in recipe_ids}
+        tags = {}
+        for tag in Tag.objects.filter(recipes__in=recipe_ids).values(
+            "id", "name", "color", "slug", recipe_id=F("recipes")
+        ):
+            recipe_id = tag.pop("recipe_id")
+            recipes_tags[recipe_id].append(tags.setdefault(tag["id"], tag))
+        return recipes_tags
+
+    @staticmethod
+    def get_ingredients(recipe_ids):
+        recipes_ingredients = {id: [] for id in recipe_ids}
+        for ingredient in AmountIngredient.objects.filter(
+            recipe__in=recipe_ids
+        ).values(
+            "recipe_id",
+            "amount",
+            "ingredient__id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+        ):
+            recipes_ingredients[ingredient["recipe_id"]].append(
+                {
+                    "id": ingredient["ingredient__id"],
+                    "name": ingredient["ingredient__name"],
+                    "measurement_unit": ingredient[
+                        "ingredient__measurement_unit"
+                    ],
+                    "amount": ingredient["amount"],
+                }
+            )
+        return recipes_ingredients
+
+    def get_image_url(self, recipe):
+        name = recipe["thumbnail"] or recipe["image"]
+        if not name:
+            return None
+        url = self.storage.url(name)
+        request = self.context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    @cached_property
+    def data(self):
+        with measure_serialization(self.context):
+            return self.get_data()
+
+    def get_data(self):
+        recipes = list(self.recipes)
+        recipe_ids = [recipe["id"] for recipe in recipes]
+        following_ids = self.get_following_ids(self.context["request"])
+        tags = self.get_tags(recipe_ids)
+        ingredients = self.get_ingredients(recipe_ids)
+        authors = {}
+        data = []
+        for recipe in recipes:
+            author = authors.get(recipe["author_id"])
+            if author is None:
+                author = authors[recipe["author_id"]] = self.get_author(
+                    recipe, following_ids
+                )
+            data.append(
+                {
+                    "id": recipe["id"],
+                    "tags": tags[recipe["id"]],
+                    "ingredients": ingredients[recipe["id"]],
+                    "author": author,
+                    "is_favorited": bool(recipe["is_favorited"]),
+                    "is_in_shopping_cart": bool(
+                        recipe["is_in_shopping_cart"]
+                    ),
+                    "name": recipe["name"],
+                    "image": self.get_image_url(recipe),
+                    "text": recipe["text"],
+                    "cooking_time": recipe["cooking_time"],
+                    "pub_date": self.pub_date_field.to_representation(
+                        recipe["pub_date"]
+                    ),
+                }
+            )
+        return data
+
+
 class RecipeCreateUpdateDestroySerializer(serializers.ModelSerializer):
     """
     Сериализатор модели Reicpe.
@@ -237,40 +538,96 @@ class RecipeCreateUpdateDestroySerializer(serializers.ModelSerializer):
         model = Recipe
         exclude = ("id",)
 
+    def validate_ingredients(self, value):
+        ingredient_ids = {ingredient["id"] for ingredient in value}
+        if len(ingredient_ids) != len(value):
+            raise ValidationError(
+                {"errors": "Ингредиенты не должны повторяться!"}
+            )
+
+        existing_count = Ingredient.objects.filter(
+            id__in=ingredient_ids
+        ).count()
+        if existing_count != len(ingredient_ids):
+            raise ValidationError({"errors": "Такого ингредиента нет!"})
+        return value
+
+    @staticmethod
+    def create_ingredients(recipe, ingredients):
+        """Метод создания записей о количестве ингредиентов одним запросом."""
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient["id"],
+                amount=ingredient["amount"],
+            )
+            for ingredient in ingredients
+        )
+
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Метод обновления ингредиентов рецепта.
+        Удаляет убранные ингредиенты, обновляет изменившиеся количества
+        и создает новые записи пакетными запросами.
+        Возвращает id ингредиентов, количество которых изменилось.
+        """
+        amounts = {
+            ingredient["id"]: ingredient["amount"]
+            for ingredient in ingredients
+        }
+        removed = []
+        changed = []
+        for amount_ingredient in recipe.ingredients.all():
+            new_amount = amounts.pop(amount_ingredient.ingredient_id, None)
+            if new_amount is None:
+                removed.append(amount_ingredient)
+            elif new_amount != amount_ingredient.amount:
+                amount_ingredient.amount = new_amount
+                changed.append(amount_ingredient)
+
+        if removed:
+            AmountIngredient.objects.filter(
+                id__in=[amount_ingredient.id for amount_ingredient in removed]
+            ).delete()
+        if changed:
+            AmountIngredient.objects.bulk_update(changed, ("amount",))
+        self.create_ingredients(
+            recipe,
+            (
+                {"id": ingredient_id, "amount": amount}
+                for ingredient_id, amount in amounts.items()
+            ),
+        )
+        return [
+            amount_ingredient.ingredient_id
+            for amount_ingredient in removed + changed
+        ] + list(amounts)
+
     @atomic
     def create(self, validated_data):
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
 
         new_recipe = Recipe.objects.create(**validated_data)
-        for tag in tags:
-            new_recipe.tags.add(tag)
-
-        for ingredient in ingredients:
-            amount = ingredient["amount"]
-            ingredient = Ingredient.objects.get(id=ingredient["id"])
-
-            AmountIngredient.objects.create(
-                amount=amount,
-                recipe=new_recipe,
-                ingredient=ingredient,
-            )
+        new_recipe.tags.set(tags)
+        self.create_ingredients(new_recipe, ingredients)
+        schedule_thumbnail(new_recipe.id)
         return new_recipe
 
     @atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
+        if "image" in validated_data:
+            release_files(get_recipe_files(instance))
+            validated_data["thumbnail"] = None
+            schedule_thumbnail(instance.id)
 
         instance.update(**validated_data)
         instance.tags.set(tags)
-
-        for ingredient in ingredients:
-            amount = ingredient["amount"]
-            ingredient = Ingredient.objects.get(id=ingredient["id"])
-            AmountIngredient.objects.update_or_create(
-                recipe=instance,
-                ingredient=ingredient,
-                defaults={"amount": amount},
+        changed_ingredients = self.update_ingredients(instance, ingredients)
+        if changed_ingredients:
+            CartIngredient.objects.refresh(
+                instance.shopping_cart.all(), changed_ingredients
             )
         return instance
@@ -0,0 +1,111 @@
+from collections import Counter, defaultdict
+
+from core.cache import bump_cache_version
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from payments.models import ShopingCart
+from recipes.models import Favorite, Ingredient, Recipe, RecipeScore, Tag
+from users.models import Follow
+
+User = get_user_model()
+ShopingCartRecipe = ShopingCart.recipes.through
+
+COUNTERS = {
+    Follow: (User, "following_id", "followers_count"),
+    Recipe: (User, "author_id", "recipes_count"),
+    Favorite: (Recipe, "recipe_id", "favorites_count"),
+}
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_cached_responses(sender, **kwargs):
+    bump_cache_version(sender._meta.label_lower)
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_score(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        RecipeScore.objects.create(recipe=instance)
+
+
+def change_counter(sender, instance, delta):
+    model, attname, field = COUNTERS[sender]
+    model.change_counters((getattr(instance, attname),), **{field: delta})
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Favorite)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    """
+    Функция увеличения счетчика при создании объекта любым способом:
+    через API, админку или ORM. bulk_create сигналы не отправляет,
+    поэтому пакетные операции изменяют счетчики сами.
+    """
+    if created and not raw:
+        change_counter(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Favorite)
+def count_deleted(sender, instance, **kwargs):
+    """
+    Функция уменьшения счетчика при удалении объекта,
+    в том числе каскадном и через QuerySet.delete().
+    """
+    change_counter(sender, instance, -1)
+
+
+def change_cart_counters(cart_recipes, delta):
+    """
+    Функция изменения счетчиков корзин рецептов из связей cart_recipes.
+    Рецепты с одинаковым изменением обновляются одним запросом.
+    """
+    recipes = defaultdict(list)
+    for recipe_id, count in Counter(
+        cart_recipes.values_list("recipe", flat=True)
+    ).items():
+        recipes[count * delta].append(recipe_id)
+    for change, recipe_ids in recipes.items():
+        Recipe.change_counters(recipe_ids, shopping_carts_count=change)
+
+
+@receiver(m2m_changed, sender=ShopingCartRecipe)
+def count_changed_cart_recipes(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Функция изменения счетчиков корзин при изменении связей через
+    ShopingCart.recipes и Recipe.shopping_cart, например в админке.
+    Связующая модель создана Django и не отправляет post_save
+    и post_delete, поэтому представления API, работающие с ней
+    напрямую, изменяют счетчики сами.
+    """
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+    if reverse:
+        cart_recipes = ShopingCartRecipe.objects.filter(recipe=instance)
+        related_field = "shopingcart__in"
+    else:
+        cart_recipes = ShopingCartRecipe.objects.filter(shopingcart=instance)
+        related_field = "recipe__in"
+    if action != "pre_clear":
+        if not pk_set:
+            return
+        cart_recipes = cart_recipes.filter(**{related_field: pk_set})
+    change_cart_counters(cart_recipes, 1 if action == "post_add" else -1)
+
+
+@receiver(pre_delete, sender=ShopingCart)
+def count_deleted_cart(sender, instance, **kwargs):
+    change_cart_counters(
+        ShopingCartRecipe.objects.filter(shopingcart=instance), -1
+    )
@@ -2,10 +2,13 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    FavoriteBulkView,
     FavoriteView,
+    FollowBulkView,
     FollowView,
     IngredientViewSet,
     RecipeViewSet,
+    ShopingCartBulkView,
     ShopingCartDownloadView,
     ShopingCartView,
     TagViewSet,
@@ -22,8 +25,11 @@ router.register("recipes", RecipeViewSet, basename="recipe")
 
 urlpatterns = [
     path("auth/", include("djoser.urls.authtoken")),
+    path("users/subscribe/", FollowBulkView.as_view()),
     path("users/<int:id>/subscribe/", FollowView.as_view()),
+    path("recipes/favorite/", FavoriteBulkView.as_view()),
     path("recipes/<int:id>/favorite/", FavoriteView.as_view()),
+    path("recipes/shopping_cart/", ShopingCartBulkView.as_view()),
     path("recipes/<int:id>/shopping_cart/", ShopingCartView.as_view()),
     path("recipes/download_shopping_cart/", ShopingCartDownloadView.as_view()),
     path("", include(router.urls)),
@@ -1,28 +1,51 @@
+from hashlib import sha1
+
+from core.cache import (
+    bump_cache_version,
+    bump_cache_versions,
+    get_cache_versions,
+)
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Exists, OuterRef
+from django.db.models import Exists, OuterRef, Prefetch
+from django.db.transaction import atomic, on_commit
 from django.db.utils import IntegrityError
 from django.shortcuts import get_object_or_404
+from downloadapp.renderers import get_renderer
 from downloadapp.utils import DownloadFile
-from payments.models import ShopingCart
-from recipes.models import Favorite, Ingredient, Recipe, Tag
+from payments.models import CartIngredient, ShopingCart
+from recipes.images import get_recipe_files, release_files
+from recipes.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeScore,
+    Tag,
+)
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ParseError
-from rest_framework.filters import SearchFilter
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from users.models import Follow
 
-from .filters import RecipeFilter
+from .filters import IngredientSearchFilter, RecipeFilter
+from .mixins import MixinCachedList
+from .pagination import RecipeKeysetPagination
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
+    BulkIdsSerializer,
     FollowSerializer,
     IngredientSerializer,
     RecipeCreateUpdateDestroySerializer,
+    RecipeListFastSerializer,
     RecipeListOrRetrieveSerializer,
+    RecipeListSerializer,
     SetPasswordSerializer,
     ShortRecipeSerializer,
     TagSerializer,
@@ -34,6 +57,33 @@ from .viewsets import ReadOnlyOrCreateViewSet
 User = get_user_model()
 
 
+def get_feed_cache_key(user_id):
+    return f"feed:{user_id}"
+
+
+def invalidate_feeds(user_ids):
+    """
+    Функция сброса кэша ленты подписок пользователей.
+    Кэш сбрасывается после фиксации текущей транзакции.
+    """
+    keys = [get_feed_cache_key(user_id) for user_id in user_ids]
+    on_commit(lambda: bump_cache_versions(keys))
+
+
+def get_author_feed_cache_key(author_id):
+    return f"feed-author:{author_id}"
+
+
+def invalidate_followers_feeds(author_id):
+    """
+    Функция сброса кэша лент подписчиков автора.
+    Меняется одна версия автора после фиксации текущей транзакции,
+    ленты сверяют версии своих авторов при чтении.
+    """
+    key = get_author_feed_cache_key(author_id)
+    on_commit(lambda: bump_cache_version(key))
+
+
 class UserViewSet(ReadOnlyOrCreateViewSet):
     """
     Вьюсет модели User.
@@ -43,9 +93,16 @@ class UserViewSet(ReadOnlyOrCreateViewSet):
     permission_classes = (AllowAny,)
 
     def get_queryset(self):
+        user = self.request.user
         if self.action == "subscriptions":
-            return User.objects.filter(followers__follower=self.request.user)
-        return User.objects.all()
+            return User.objects.filter(followers__follower=user).order_by("id")
+        if not user.is_authenticated:
+            user = None
+        return User.objects.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(follower=user, following=OuterRef("pk"))
+            )
+        ).order_by("id")
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -93,6 +150,69 @@ class UserViewSet(ReadOnlyOrCreateViewSet):
         return self.list(request)
 
 
+class BulkRelationView(APIView):
+    """
+    Базовый API класс-контроллер пакетного создания связей
+    текущего пользователя с объектами по списку id.
+    Существование объектов проверяется одним запросом, связи создаются
+    одним bulk_create. Для каждого id возвращается результат:
+    created, exists, not_found или forbidden.
+    """
+
+    model = None
+
+    def lock_owner(self, request):
+        """
+        Метод блокировки строки, на которую ссылаются создаваемые связи.
+        Вставка связи с внешним ключом на заблокированную строку ждет
+        конца транзакции, поэтому одновременные запросы не создают
+        и не учитывают в счетчиках одни и те же связи дважды.
+        """
+        User.objects.select_for_update().only("pk").get(pk=request.user.pk)
+
+    def get_forbidden_ids(self, request):
+        return set()
+
+    def get_existing_ids(self, request, ids):
+        raise NotImplementedError
+
+    def create_relations(self, request, objects):
+        raise NotImplementedError
+
+    @atomic
+    def post(self, request):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data["ids"]))
+        self.lock_owner(request)
+        forbidden = self.get_forbidden_ids(request)
+
+        objects = self.model.objects.in_bulk(
+            [id for id in ids if id not in forbidden]
+        )
+        existing = (
+            self.get_existing_ids(request, list(objects)) if objects else set()
+        )
+        new_objects = [
+            obj for id, obj in objects.items() if id not in existing
+        ]
+        if new_objects:
+            self.create_relations(request, new_objects)
+
+        results = []
+        for id in ids:
+            if id in forbidden:
+                result = "forbidden"
+            elif id not in objects:
+                result = "not_found"
+            elif id in existing:
+                result = "exists"
+            else:
+                result = "created"
+            results.append({"id": id, "status": result})
+        return Response({"results": results})
+
+
 class FollowView(APIView):
     """
     API класс-контроллер.
@@ -100,6 +220,7 @@ class FollowView(APIView):
     Предназначен для создания и удаления подписки.
     """
 
+    @atomic
     def post(self, request, id):
         following_user = get_object_or_404(User, id=id)
         try:
@@ -108,9 +229,13 @@ class FollowView(APIView):
             )
         except IntegrityError:
             raise ParseError({"errors": "Нельзя подписаться!"})
-        serializer = FollowSerializer(following_user)
+        invalidate_feeds((request.user.id,))
+        serializer = FollowSerializer(
+            following_user, context={"request": request}
+        )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @atomic
     def delete(self, request, id):
         following_user = get_object_or_404(User, id=id)
         try:
@@ -123,14 +248,44 @@ class FollowView(APIView):
             )
 
         follow.delete()
+        invalidate_feeds((request.user.id,))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class FollowBulkView(BulkRelationView):
+    """
+    API класс-контроллер.
+    Поддерживает типы запросов: post.
+    Предназначен для подписки на нескольких пользователей.
+    """
+
+    model = User
+
+    def get_forbidden_ids(self, request):
+        return {request.user.id}
+
+    def get_existing_ids(self, request, ids):
+        return set(
+            Follow.objects.filter(
+                follower=request.user, following__in=ids
+            ).values_list("following", flat=True)
+        )
+
+    def create_relations(self, request, users):
+        Follow.objects.bulk_create(
+            (Follow(follower=request.user, following=user) for user in users),
+            ignore_conflicts=True,
+        )
+        User.change_counters([user.id for user in users], followers_count=1)
+        invalidate_feeds((request.user.id,))
+
+
+class TagViewSet(MixinCachedList, ReadOnlyModelViewSet):
     """
     Вьюсет модели Tag.
     Поддерживает ограниченный набор действий: list, retrive.
     Предназначен для получения тегов.
+    Список тегов кэшируется.
     """
 
     queryset = Tag.objects.all()
@@ -139,65 +294,142 @@ class TagViewSet(ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(MixinCachedList, ReadOnlyModelViewSet):
     """
     Вьюсет модели Ingredient.
     Поддерживает ограниченный набор действий: list, retrive.
     Предназначен для получения ингредиентов.
+    Список ингредиентов кэшируется.
     """
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
-    filter_backends = (SearchFilter,)
-    search_fields = ("name",)
+    filter_backends = (IngredientSearchFilter,)
 
 
 class RecipeViewSet(ModelViewSet):
     """
     Вьюсет модели Recipe.
     Поддерживает полный набор действий.
+    При наличии параметра cursor список выводится с курсорной пагинацией.
+    Параметр ordering=popular|trending сортирует список по рейтингу,
+    курсорная пагинация в этом случае идет по ключу рейтинга.
+    Лента подписок /feed/ всегда выводится с курсорной пагинацией.
     """
 
     permission_classes = (IsAuthorOrReadOnly,)
     custom_filter = RecipeFilter()
+    keyset_pagination_class = RecipeKeysetPagination
+    ordering_param = "ordering"
+    orderings = {
+        "popular": (("score__popular", float), ("score__recipe_id", int)),
+        "trending": (("score__trending", float), ("score__recipe_id", int)),
+    }
+
+    @property
+    def paginator(self):
+        cursor_query_param = self.keyset_pagination_class.cursor_query_param
+        if not hasattr(self, "_paginator") and (
+            self.action == "feed"
+            or cursor_query_param in self.request.query_params
+        ):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+    def get_ordering_key(self):
+        """
+        Метод получения ключа сортировки по рейтингу: пар (поле, функция
+        разбора значения из курсора). Поля берутся из строки рейтинга,
+        поэтому сортировка совпадает с порядком его индексов.
+        """
+        return self.orderings.get(
+            self.request.query_params.get(self.ordering_param)
+        )
 
     def filter_queryset(self, queryset):
         query_params = self.request.query_params
-        filter_fields = self.custom_filter.get_filter_fields(query_params)
-        return queryset.filter(**filter_fields).distinct()
+        queryset = self.custom_filter.filter_queryset(queryset, query_params)
+        ordering_key = self.get_ordering_key()
+        if ordering_key is not None:
+            queryset = (
+                queryset.filter(score__isnull=False)
+                .select_related("score")
+                .order_by(*(f"-{field}" for field, _ in ordering_key))
+            )
+        return queryset
 
-    def get_queryset(self):
+    def get_annotated_queryset(self):
         user = self.request.user
         if not user.is_authenticated:
             user = None
+        queryset = Recipe.objects.annotate(
+            is_in_shopping_cart=Exists(
+                ShopingCart.objects.filter(user=user, recipes=OuterRef("pk"))
+            ),
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+            ),
+        )
+        if self.action == "feed":
+            queryset = queryset.filter(
+                author__in=Follow.objects.filter(follower=user).values(
+                    "following"
+                )
+            )
+        return queryset
+
+    def get_queryset(self):
         return (
-            Recipe.objects.select_related("author")
-            .prefetch_related("ingredients", "tags")
-            .annotate(
-                is_in_shopping_cart=Exists(
-                    ShopingCart.objects.filter(
-                        user=self.request.user, recipes=OuterRef("pk")
-                    )
-                ),
-                is_favorited=Exists(
-                    Favorite.objects.filter(
-                        user=self.request.user, recipe=OuterRef("pk")
-                    )
+            self.get_annotated_queryset()
+            .select_related("author")
+            .prefetch_related(
+                Prefetch(
+                    "ingredients",
+                    queryset=AmountIngredient.objects.select_related(
+                        "ingredient"
+                    ),
                 ),
+                "tags",
             )
         )
 
     def get_serializer_class(self):
-        if self.action in ("list", "retrieve"):
+        if self.action in ("list", "feed"):
+            return RecipeListSerializer
+        if self.action == "retrieve":
             return RecipeListOrRetrieveSerializer
         return RecipeCreateUpdateDestroySerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Метод вывода списка рецептов.
+        При RECIPE_LIST_FAST_PATH = True список с постраничной
+        пагинацией выводится быстрым сериализатором из queryset.values().
+        """
+        if not settings.RECIPE_LIST_FAST_PATH or isinstance(
+            self.paginator, self.keyset_pagination_class
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_annotated_queryset()).values(
+            *RecipeListFastSerializer.fields
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = RecipeListFastSerializer(
+            queryset if page is None else page,
+            context=self.get_serializer_context(),
+        )
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         instance = serializer.save()
+        invalidate_followers_feeds(instance.author_id)
         instance = self.get_queryset().get(id=instance.id)
         serializer = RecipeListOrRetrieveSerializer(
             instance, context={"request": request}
@@ -207,6 +439,56 @@ class RecipeViewSet(ModelViewSet):
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
         )
 
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_followers_feeds(serializer.instance.author_id)
+
+    @atomic
+    def perform_destroy(self, instance):
+        carts = list(instance.shopping_cart.all())
+        ingredients = list(
+            instance.ingredients.values_list("ingredient", flat=True)
+        )
+        instance.delete()
+        if carts:
+            CartIngredient.objects.refresh(carts, ingredients)
+        invalidate_followers_feeds(instance.author_id)
+        release_files(get_recipe_files(instance))
+
+    @action(("get",), detail=False, permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        """
+        Метод, предоставляющий эндпоинт /feed/.
+        По нему можно получить последние рецепты авторов, на которых
+        подписан текущий пользователь. Первая страница ленты кэшируется,
+        ключ кэша включает версии ленты пользователя и всех его авторов,
+        которые меняются при публикации, изменении и удалении рецептов.
+        """
+        cursor_query_param = self.keyset_pagination_class.cursor_query_param
+        is_head_page = not request.query_params.get(cursor_query_param)
+        if not (is_head_page and settings.FEED_CACHE_TIMEOUT):
+            return self.list(request)
+
+        following = Follow.objects.filter(follower=request.user).order_by(
+            "following"
+        )
+        versions = get_cache_versions(
+            [get_feed_cache_key(request.user.id)]
+            + [
+                get_author_feed_cache_key(author_id)
+                for author_id in following.values_list("following", flat=True)
+            ]
+        )
+        digest = sha1(":".join(versions).encode()).hexdigest()
+        cache_key = (
+            f"feed:{request.user.id}:{digest}:{request.get_full_path()}"
+        )
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.list(request).data
+            cache.set(cache_key, data, settings.FEED_CACHE_TIMEOUT)
+        return Response(data)
+
 
 class FavoriteView(APIView):
     """
@@ -215,15 +497,19 @@ class FavoriteView(APIView):
     Предназначен для добавления и удаления рецепта из списка избранного.
     """
 
+    @atomic
     def post(self, request, id):
         recipe = get_object_or_404(Recipe, id=id)
         try:
             Favorite.objects.create(recipe=recipe, user=request.user)
         except IntegrityError:
             raise ParseError({"errors": "Рецепт уже в избранном!"})
+        RecipeScore.change_scores((recipe,), settings.FAVORITE_SCORE_WEIGHT)
+        invalidate_feeds((request.user.id,))
         serializer = ShortRecipeSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @atomic
     def delete(self, request, id):
         recipe = get_object_or_404(Recipe, id=id)
         try:
@@ -232,6 +518,8 @@ class FavoriteView(APIView):
             raise ParseError({"errors": "Рецепт не в избранном!"})
 
         favorite.delete()
+        RecipeScore.change_scores((recipe,), -settings.FAVORITE_SCORE_WEIGHT)
+        invalidate_feeds((request.user.id,))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -242,39 +530,141 @@ class ShopingCartView(APIView):
     Предназначен для добавления и удаления рецепта из корзины покупок.
     """
 
+    @atomic
     def post(self, request, id):
         recipe = get_object_or_404(Recipe, id=id)
         cart, created = ShopingCart.objects.get_or_create(user=request.user)
-
-        if recipe in cart.recipes.all():
+        try:
+            ShopingCart.recipes.through.objects.create(
+                shopingcart=cart, recipe=recipe
+            )
+        except IntegrityError:
             raise ParseError({"errors": "Рецепт уже добавлен в корзину!"})
 
-        cart.recipes.add(recipe)
+        CartIngredient.objects.refresh(
+            (cart,), recipe.ingredients.values("ingredient")
+        )
+        Recipe.change_counters((recipe.id,), shopping_carts_count=1)
+        RecipeScore.change_scores(
+            (recipe,), settings.SHOPPING_CART_SCORE_WEIGHT
+        )
+        invalidate_feeds((request.user.id,))
         serializer = ShortRecipeSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @atomic
     def delete(self, request, id):
         recipe = get_object_or_404(Recipe, id=id)
-        cart = get_object_or_404(ShopingCart, user=request.user)
-
-        if recipe not in cart.recipes.all():
+        deleted, _ = ShopingCart.recipes.through.objects.filter(
+            shopingcart__user=request.user, recipe=recipe
+        ).delete()
+        if not deleted:
             raise ParseError({"errors": "Рецепта нет в корзине!"})
 
-        cart.recipes.remove(recipe)
+        CartIngredient.objects.refresh(
+            ShopingCart.objects.filter(user=request.user),
+            recipe.ingredients.values("ingredient"),
+        )
+        Recipe.change_counters((recipe.id,), shopping_carts_count=-1)
+        RecipeScore.change_scores(
+            (recipe,), -settings.SHOPPING_CART_SCORE_WEIGHT
+        )
+        invalidate_feeds((request.user.id,))
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class FavoriteBulkView(BulkRelationView):
+    """
+    API класс-контроллер.
+    Поддерживает типы запросов: post.
+    Предназначен для добавления нескольких рецептов в избранное.
+    """
+
+    model = Recipe
+
+    def get_existing_ids(self, request, ids):
+        return set(
+            Favorite.objects.filter(
+                user=request.user, recipe__in=ids
+            ).values_list("recipe", flat=True)
+        )
+
+    def create_relations(self, request, recipes):
+        Favorite.objects.bulk_create(
+            (Favorite(user=request.user, recipe=recipe) for recipe in recipes),
+            ignore_conflicts=True,
+        )
+        Recipe.change_counters(
+            [recipe.id for recipe in recipes], favorites_count=1
+        )
+        RecipeScore.change_scores(recipes, settings.FAVORITE_SCORE_WEIGHT)
+        invalidate_feeds((request.user.id,))
+
+
+class ShopingCartBulkView(BulkRelationView):
+    """
+    API класс-контроллер.
+    Поддерживает типы запросов: post.
+    Предназначен для добавления нескольких рецептов в корзину покупок.
+    """
+
+    model = Recipe
+
+    def get_existing_ids(self, request, ids):
+        return set(
+            ShopingCart.recipes.through.objects.filter(
+                shopingcart__user=request.user, recipe__in=ids
+            ).values_list("recipe", flat=True)
+        )
+
+    def lock_owner(self, request):
+        cart, created = ShopingCart.objects.get_or_create(user=request.user)
+        self.cart = ShopingCart.objects.select_for_update().get(pk=cart.pk)
+
+    def create_relations(self, request, recipes):
+        Through = ShopingCart.recipes.through
+        Through.objects.bulk_create(
+            (
+                Through(shopingcart=self.cart, recipe=recipe)
+                for recipe in recipes
+            ),
+            ignore_conflicts=True,
+        )
+        CartIngredient.objects.refresh(
+            (self.cart,),
+            AmountIngredient.objects.filter(recipe__in=recipes).values(
+                "ingredient"
+            ),
+        )
+        Recipe.change_counters(
+            [recipe.id for recipe in recipes], shopping_carts_count=1
+        )
+        RecipeScore.change_scores(
+            recipes, settings.SHOPPING_CART_SCORE_WEIGHT
+        )
+        invalidate_feeds((request.user.id,))
+
+
 class ShopingCartDownloadView(APIView):
     """
     API класс-контроллер.
     Поддерживает типы запросов: get.
     Предназначен для скачивания файла со списком ингредиентов из корзины.
+    Формат файла выбирается параметром format: txt, csv, json.
     """
 
+    def perform_content_negotiation(self, request, force=False):
+        # Параметр format выбирает формат файла, а не рендерер DRF.
+        return super().perform_content_negotiation(request, force=True)
+
     def get(self, request):
+        renderer = get_renderer(request.query_params.get("format", "txt"))
+        if renderer is None:
+            raise NotFound({"errors": "Такого формата файла нет!"})
+
         user_cart = get_object_or_404(ShopingCart, user=request.user)
         content = user_cart.make_file_content()
-        file_name = user_cart.make_txt_file_name()
+        file_name = user_cart.make_file_name()
 
-        file = DownloadFile(file_name, content)
+        file = DownloadFile(file_name, content, renderer)
         return file.download_file()
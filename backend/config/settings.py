@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -80,6 +81,21 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+FEED_CACHE_TIMEOUT = 60 * 5
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -124,6 +140,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+MAX_IMAGE_SIZE = 5 * 1024 * 1024
+THUMBNAIL_SIZE = (480, 480)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+ORPHAN_FILE_MIN_AGE = 60 * 60
 
 
 # Custom user model
@@ -140,6 +161,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.TokenAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 6,
     "SEARCH_PARAM": "name",
@@ -150,7 +180,17 @@ DJOSER = {
 }
 
 
-DOWNLOADFILES_DIR = os.path.join(BASE_DIR, "downloadapp/downloads")
-
 MIN_VALUE_COOKING_TIME = 1
 MIN_VALUE_AMOUNT = 0
+INGREDIENT_SEARCH_LIMIT = 20
+BULK_IDS_LIMIT = 100
+RECIPE_LIST_FAST_PATH = os.getenv("RECIPE_LIST_FAST_PATH") == "true"
+SLOW_QUERY_THRESHOLD = (
+    float(os.getenv("SLOW_QUERY_THRESHOLD"))
+    if os.getenv("SLOW_QUERY_THRESHOLD")
+    else None
+)
+
+FAVORITE_SCORE_WEIGHT = 1
+SHOPPING_CART_SCORE_WEIGHT = 2
+TRENDING_GRAVITY = 1.5
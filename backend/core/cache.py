@@ -0,0 +1,39 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+
+def get_cache_version(key: str) -> str:
+    """Функция получения текущей версии кэша для ключа."""
+    return cache.get_or_set(f"version:{key}", uuid4().hex, timeout=None)
+
+
+def bump_cache_version(key: str) -> None:
+    """
+    Функция смены версии кэша для ключа.
+    Все записи, сохраненные с предыдущей версией, становятся недоступны.
+    """
+    cache.set(f"version:{key}", uuid4().hex, timeout=None)
+
+
+def bump_cache_versions(keys) -> None:
+    """Функция смены версий кэша для нескольких ключей одним запросом."""
+    cache.set_many({f"version:{key}": uuid4().hex for key in keys}, None)
+
+
+def get_cache_versions(keys) -> list:
+    """
+    Функция получения текущих версий кэша для нескольких ключей
+    одним запросом. Отсутствующие версии создаются.
+    """
+    version_keys = [f"version:{key}" for key in keys]
+    versions = cache.get_many(version_keys)
+    missing = {
+        version_key: uuid4().hex
+        for version_key in version_keys
+        if version_key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[version_key] for version_key in version_keys]
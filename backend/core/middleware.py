@@ -0,0 +1,292 @@
+import logging
+import os
+import traceback
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+DJANGO_DIR = os.path.dirname(django.__file__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+class ViewMetrics:
+    """Накопленные метрики запросов одного представления."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.app_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.response_size = 0
+        self.duration_buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration_sum = 0.0
+
+    def add(self, request_metrics, duration, response_size):
+        self.requests += 1
+        self.queries += request_metrics.queries
+        self.db_time += request_metrics.db_time
+        self.app_time += request_metrics.app_time
+        self.serialize_time += request_metrics.serialize_time
+        self.render_time += request_metrics.render_time
+        self.response_size += response_size
+        self.duration_buckets[bisect_left(DURATION_BUCKETS, duration)] += 1
+        self.duration_sum += duration
+
+
+class MetricsRegistry:
+    """
+    Хранилище метрик процесса, сгруппированных по представлениям.
+    Выводит их в текстовом формате Prometheus.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.views = defaultdict(ViewMetrics)
+
+    def add(self, view, method, status, request_metrics, duration, size):
+        with self.lock:
+            self.views[view, method, status].add(
+                request_metrics, duration, size
+            )
+
+    def get_counters(self, metrics):
+        return (
+            ("requests_total", "counter", metrics.requests),
+            ("db_queries_total", "counter", metrics.queries),
+            ("db_seconds_total", "counter", metrics.db_time),
+            ("app_seconds_total", "counter", metrics.app_time),
+            ("serialize_seconds_total", "counter", metrics.serialize_time),
+            ("render_seconds_total", "counter", metrics.render_time),
+            ("response_bytes_total", "counter", metrics.response_size),
+        )
+
+    def render(self):
+        with self.lock:
+            views = {
+                labels: (
+                    self.get_counters(metrics),
+                    list(metrics.duration_buckets),
+                    metrics.duration_sum,
+                )
+                for labels, metrics in self.views.items()
+            }
+
+        lines = []
+        samples = defaultdict(list)
+        for (view, method, status), (counters, buckets, total) in sorted(
+            views.items()
+        ):
+            labels = f'view="{view}",method="{method}",status="{status}"'
+            for name, _, value in counters:
+                samples[name].append(f"foodgram_{name}{{{labels}}} {value}")
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), buckets):
+                cumulative += count
+                samples["request_duration_seconds"].append(
+                    "foodgram_request_duration_seconds_bucket"
+                    f'{{{labels},le="{bound}"}} {cumulative}'
+                )
+            samples["request_duration_seconds"].extend(
+                (
+                    "foodgram_request_duration_seconds_sum"
+                    f"{{{labels}}} {total}",
+                    "foodgram_request_duration_seconds_count"
+                    f"{{{labels}}} {cumulative}",
+                )
+            )
+
+        types = {
+            name: metric_type
+            for name, metric_type, _ in self.get_counters(ViewMetrics())
+        }
+        types["request_duration_seconds"] = "histogram"
+        for name, metric_type in types.items():
+            lines.append(f"# TYPE foodgram_{name} {metric_type}")
+            lines.extend(samples[name])
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса.
+    Подключается к соединению с базой данных через execute_wrapper
+    и учитывает количество и время SQL-запросов.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.app_time = None
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.serializing = False
+        self.slow_query_threshold = settings.SLOW_QUERY_THRESHOLD
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            if (
+                self.slow_query_threshold is not None
+                and duration >= self.slow_query_threshold
+            ):
+                self.log_slow_query(sql, duration)
+
+    @contextmanager
+    def measure_serialization(self):
+        """
+        Метод учета времени сериализации ответа.
+        Время SQL-запросов внутри блока учитывается только в db_time,
+        вложенные блоки повторно не учитываются.
+        """
+        if self.serializing:
+            yield
+            return
+        self.serializing = True
+        start, db_time = perf_counter(), self.db_time
+        try:
+            yield
+        finally:
+            self.serializing = False
+            self.serialize_time += max(
+                perf_counter() - start - (self.db_time - db_time), 0
+            )
+
+    def get_app_time(self, duration):
+        return max(duration - self.db_time - self.serialize_time, 0)
+
+    @staticmethod
+    def get_query_origin():
+        """
+        Метод определения места вызова запроса: ближайшей к запросу
+        строки кода проекта, если ее нет - ближайшей строки вне Django.
+        """
+        stack = [
+            frame
+            for frame in reversed(traceback.extract_stack())
+            if frame.filename != __file__
+            and not frame.filename.startswith(DJANGO_DIR)
+        ]
+        for frame in stack:
+            if frame.filename.startswith(str(settings.BASE_DIR)) and (
+                "site-packages" not in frame.filename
+            ):
+                break
+        else:
+            if not stack:
+                return "unknown"
+            frame = stack[0]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+    def log_slow_query(self, sql, duration):
+        logger.warning(
+            "Медленный запрос %.1f мс из %s: %s",
+            duration * 1000,
+            self.get_query_origin(),
+            sql,
+        )
+
+
+class MetricsMiddleware:
+    """
+    Middleware сбора метрик запросов к API.
+    Для каждого представления и действия учитывает количество
+    и время SQL-запросов, время кода представления, время сериализаторов,
+    время рендеринга и размер ответа. Метрики запроса передаются
+    в заголовке Server-Timing, накопленные - по адресу metrics/.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.metrics = request_metrics = RequestMetrics()
+        request.metrics_view = "unresolved"
+        start = perf_counter()
+        with connection.execute_wrapper(request_metrics):
+            response = self.get_response(request)
+        duration = perf_counter() - start
+        if request_metrics.app_time is None:
+            request_metrics.app_time = request_metrics.get_app_time(duration)
+
+        size = 0 if response.streaming else len(response.content)
+        response["Server-Timing"] = self.get_server_timing(
+            request_metrics, duration
+        )
+        registry.add(
+            request.metrics_view,
+            request.method,
+            response.status_code,
+            request_metrics,
+            duration,
+            size,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view_start = perf_counter()
+        view_class = getattr(view_func, "cls", None)
+        if view_class is None:
+            request.metrics_view = view_func.__name__
+            return None
+        actions = getattr(view_func, "actions", None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        request.metrics_view = f"{view_class.__name__}.{action}"
+        return None
+
+    def process_template_response(self, request, response):
+        request_metrics = request.metrics
+        view_start = getattr(request, "metrics_view_start", None)
+        if view_start is not None:
+            request_metrics.app_time = request_metrics.get_app_time(
+                perf_counter() - view_start
+            )
+        render_start = perf_counter()
+
+        def finish_render(response):
+            request_metrics.render_time = perf_counter() - render_start
+
+        response.add_post_render_callback(finish_render)
+        return response
+
+    @staticmethod
+    def get_server_timing(request_metrics, duration):
+        return ", ".join(
+            (
+                f"db;dur={request_metrics.db_time * 1000:.1f};"
+                f'desc="{request_metrics.queries} queries"',
+                f"app;dur={request_metrics.app_time * 1000:.1f}",
+                f"serialize;dur={request_metrics.serialize_time * 1000:.1f}",
+                f"render;dur={request_metrics.render_time * 1000:.1f}",
+                f"total;dur={duration * 1000:.1f}",
+            )
+        )
+
+
+def metrics_view(request):
+    """
+    Представление, выводящее накопленные метрики процесса
+    в текстовом формате Prometheus.
+    """
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
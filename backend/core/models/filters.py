@@ -16,6 +16,22 @@ class FilterClass:
             if key in self.Meta.fields
         }
 
+    def filter_queryset(self, queryset, query_params):
+        """
+        Метод фильтрации queryset по параметрам запроса.
+        Поля из Meta.many_to_many_fields фильтруются подзапросом по pk,
+        поэтому строки не размножаются и distinct() не нужен.
+        """
+        filter_fields = self.get_filter_fields(query_params)
+        for field in getattr(self.Meta, "many_to_many_fields", ()):
+            if field not in filter_fields:
+                continue
+            subquery = queryset.model._default_manager.filter(
+                **{field: filter_fields.pop(field)}
+            ).values("pk")
+            queryset = queryset.filter(pk__in=subquery)
+        return queryset.filter(**filter_fields)
+
 
 class FilterField:
     def __init__(self, filter_field):
@@ -1,3 +1,7 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
 class UpdateMixin(object):
     """
     Миксин, предоставляющий метод update для отдельного объекта.
@@ -9,3 +13,22 @@ class UpdateMixin(object):
         for field, value in kwargs.items():
             setattr(self, field, value)
         self.save(update_fields=kwargs.keys())
+
+
+class CounterMixin(object):
+    """
+    Миксин, предоставляющий метод атомарного изменения счетчиков.
+    Значения изменяются в базе данных выражениями F() одним запросом.
+    При уменьшении счетчик не опускается ниже нуля.
+    """
+
+    @classmethod
+    def change_counters(cls, ids, **deltas):
+        return cls.objects.filter(pk__in=ids).update(
+            **{
+                field: Greatest(F(field) + delta, 0)
+                if delta < 0
+                else F(field) + delta
+                for field, delta in deltas.items()
+            }
+        )
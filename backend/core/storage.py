@@ -0,0 +1,47 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, сохраняющее файлы по хешу SHA-256 содержимого:
+    <каталог upload_to>/<первые 2 символа хеша>/<хеш>.<расширение>.
+    Одинаковые файлы хранятся один раз, существующий файл
+    повторно не записывается, а только обновляет время изменения,
+    чтобы его не удалили как давно неиспользуемый.
+    """
+
+    hash_chunk_size = 64 * 1024
+
+    def get_content_hash(self, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks(self.hash_chunk_size):
+            sha256.update(chunk)
+        content.seek(0)
+        return sha256.hexdigest()
+
+    def get_content_name(self, name, content):
+        dirname, filename = posixpath.split(name.replace("\\", "/"))
+        ext = os.path.splitext(filename)[1].lower()
+        digest = self.get_content_hash(content)
+        return posixpath.join(dirname, digest[:2], f"{digest}{ext}")
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        return self._save(name, content)
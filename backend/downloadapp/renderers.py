@@ -0,0 +1,83 @@
+import csv
+import json
+
+RENDERERS = {}
+
+
+def register(renderer_class):
+    """Декоратор, добавляющий рендерер в реестр форматов."""
+    RENDERERS[renderer_class.format] = renderer_class()
+    return renderer_class
+
+
+def get_renderer(format):
+    return RENDERERS.get(format)
+
+
+class FileRenderer:
+    """
+    Базовый класс рендерера файла для скачивания.
+    Принимает итератор строк вида
+    {"name": ..., "measurement_unit": ..., "amount": ...}
+    и построчно отдает содержимое файла.
+    """
+
+    format = None
+    content_type = None
+
+    def render(self, rows):
+        raise NotImplementedError
+
+
+class Echo:
+    """Псевдобуфер, возвращающий записанное значение вместо хранения."""
+
+    def write(self, value):
+        return value
+
+
+@register
+class TxtRenderer(FileRenderer):
+    format = "txt"
+    content_type = "text/plain; charset=utf-8"
+    line_template = "{name} ({measurement_unit}) - {amount}\n"
+
+    def render(self, rows):
+        format_line = self.line_template.format_map
+        for row in rows:
+            yield format_line(row)
+
+
+@register
+class CsvRenderer(FileRenderer):
+    format = "csv"
+    content_type = "text/csv; charset=utf-8"
+    fields = ("name", "measurement_unit", "amount")
+
+    def render(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.fields)
+        for row in rows:
+            yield writer.writerow(
+                (row["name"], row["measurement_unit"], row["amount"])
+            )
+
+
+@register
+class JsonRenderer(FileRenderer):
+    format = "json"
+    content_type = "application/json"
+
+    def render(self, rows):
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        separator = "["
+        for row in rows:
+            yield separator + encode(
+                {
+                    "name": row["name"],
+                    "measurement_unit": row["measurement_unit"],
+                    "amount": row["amount"],
+                }
+            )
+            separator = ","
+        yield "[]" if separator == "[" else "]"
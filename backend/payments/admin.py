@@ -1,5 +1,12 @@
 from django.contrib import admin
 
-from .models import ShopingCart
+from .models import CartIngredient, ShopingCart
 
-admin.site.register(ShopingCart)
+
+class ShopingCartAdmin(admin.ModelAdmin):
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        CartIngredient.objects.refresh((form.instance,))
+
+
+admin.site.register(ShopingCart, ShopingCartAdmin)
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.18 on 2026-10-18 06:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_cart_ingredients(apps, schema_editor):
+    AmountIngredient = apps.get_model('recipes', 'AmountIngredient')
+    CartIngredient = apps.get_model('payments', 'CartIngredient')
+    amounts = (
+        AmountIngredient.objects.filter(recipe__shopping_cart__isnull=False)
+        .values('recipe__shopping_cart', 'ingredient')
+        .annotate(total=models.Sum('amount'))
+    )
+    CartIngredient.objects.bulk_create(
+        CartIngredient(
+            cart_id=amount['recipe__shopping_cart'],
+            ingredient_id=amount['ingredient'],
+            amount=amount['total'],
+        )
+        for amount in amounts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_alter_amountingredient_amount'),
+        ('payments', '0007_auto_20230415_0024'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartIngredient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.FloatField()),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredients', to='payments.shopingcart')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipes.ingredient')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='cartingredient',
+            constraint=models.UniqueConstraint(fields=('cart', 'ingredient'), name='unique_cart_ingredient'),
+        ),
+        migrations.RunPython(fill_cart_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.18 on 2026-10-18 06:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_cartingredient'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cartingredient',
+            name='cart',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ingredients', to='payments.shopingcart'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.db.models import Sum
-from recipes.models import AmountIngredient, Recipe
+from django.db.models import F, QuerySet, Sum
+from django.db.transaction import atomic
+from recipes.models import AmountIngredient, Ingredient, Recipe
 
 User = get_user_model()
 
@@ -14,13 +15,86 @@ class ShopingCart(models.Model):
     )
     recipes = models.ManyToManyField(Recipe, related_name="shopping_cart")
 
-    def make_file_content(self) -> dict:
-        content = (
-            AmountIngredient.objects.filter(recipe__in=self.recipes.all())
-            .values("ingredient__name")
-            .annotate(amount=Sum("amount"))
-        )
+    def make_file_content(self) -> QuerySet:
+        content = self.ingredients.values(
+            "amount",
+            name=F("ingredient__name"),
+            measurement_unit=F("ingredient__measurement_unit"),
+        ).order_by("name")
         return content
 
-    def make_txt_file_name(self) -> str:
-        return f"{self.user.get_full_name()}.txt"
+    def make_file_name(self) -> str:
+        return self.user.get_full_name()
+
+
+class CartIngredientManager(models.Manager):
+    def refresh(self, carts, ingredients=None):
+        """
+        Метод пересчета суммарного количества ингредиентов в корзинах.
+        Пересчитываются только переданные ингредиенты,
+        если они не переданы - весь список покупок корзин.
+        Корзины блокируются select_for_update, поэтому одновременные
+        пересчеты одной корзины выполняются по очереди.
+        """
+        if not isinstance(carts, QuerySet):
+            carts = [cart.pk for cart in carts]
+        with atomic():
+            cart_ids = list(
+                ShopingCart.objects.select_for_update()
+                .filter(pk__in=carts)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+            self.recalculate(cart_ids, ingredients)
+
+    def recalculate(self, cart_ids, ingredients):
+        cart_ingredients = self.filter(cart__in=cart_ids)
+        amounts = AmountIngredient.objects.filter(
+            recipe__shopping_cart__in=cart_ids
+        )
+        if ingredients is not None:
+            cart_ingredients = cart_ingredients.filter(
+                ingredient__in=ingredients
+            )
+            amounts = amounts.filter(ingredient__in=ingredients)
+
+        cart_ingredients.delete()
+        self.bulk_create(
+            self.model(
+                cart_id=amount["recipe__shopping_cart"],
+                ingredient_id=amount["ingredient"],
+                amount=amount["total"],
+            )
+            for amount in amounts.values(
+                "recipe__shopping_cart", "ingredient"
+            ).annotate(total=Sum("amount"))
+        )
+
+
+class CartIngredient(models.Model):
+    """
+    Модель суммарного количества ингредиента в корзине покупок.
+    Поддерживается при изменении корзины и ингредиентов рецептов,
+    из нее формируется файл со списком покупок.
+    """
+
+    cart = models.ForeignKey(
+        ShopingCart,
+        on_delete=models.CASCADE,
+        related_name="ingredients",
+        db_index=False,
+    )
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    amount = models.FloatField()
+
+    objects = CartIngredientManager()
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("cart", "ingredient"), name="unique_cart_ingredient"
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.cart} {self.ingredient.name} {self.amount}"
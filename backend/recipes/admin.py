@@ -1,20 +1,20 @@
 from django.contrib import admin
-from django.db.models.aggregates import Count
 
 from .models import AmountIngredient, Ingredient, Recipe, Tag
 
 
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("name", "author", "text", "cooking_time", "favorite_count")
+    list_display = (
+        "name",
+        "author",
+        "text",
+        "cooking_time",
+        "favorites_count",
+    )
     list_filter = ("name", "author", "tags")
+    readonly_fields = ("favorites_count", "shopping_carts_count")
     empty_value_display = "-пусто-"
 
-    def get_queryset(self, request):
-        return Recipe.objects.annotate(favorite_count=Count("favorites"))
-
-    def favorite_count(self, obj):
-        return obj.favorite_count
-
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ("name", "measurement_unit")
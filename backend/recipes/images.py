@@ -0,0 +1,125 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import Q
+from django.db.transaction import on_commit
+from django.utils import timezone
+from PIL import Image, features
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=max(settings.THUMBNAIL_WORKERS, 1),
+    thread_name_prefix="thumbnails",
+)
+
+
+def get_thumbnail_format():
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def render_thumbnail(image_file):
+    """
+    Функция создания уменьшенной копии изображения.
+    Копия вписывается в THUMBNAIL_SIZE и сохраняется в WebP,
+    если Pillow собран без его поддержки - в JPEG.
+    """
+    thumbnail_format = get_thumbnail_format()
+    with Image.open(image_file) as image:
+        image.draft("RGB", settings.THUMBNAIL_SIZE)
+        image.thumbnail(settings.THUMBNAIL_SIZE)
+        if image.mode not in ("RGB", "RGBA") or thumbnail_format == "JPEG":
+            image = image.convert("RGB")
+        buffer = BytesIO()
+        image.save(
+            buffer, thumbnail_format, quality=settings.THUMBNAIL_QUALITY
+        )
+    return buffer.getvalue(), thumbnail_format.lower()
+
+
+def make_thumbnail(recipe_id):
+    """
+    Функция создания уменьшенной копии изображения рецепта.
+    Копия сохраняется, только если изображение рецепта
+    не изменилось за время ее создания.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).only("image").first()
+    if recipe is None or not recipe.image:
+        return
+    with recipe.image.open("rb") as image_file:
+        content, ext = render_thumbnail(image_file)
+    name = f"{PurePosixPath(recipe.image.name).stem}.{ext}"
+    recipe.thumbnail.save(name, ContentFile(content), save=False)
+    updated = Recipe.objects.filter(
+        id=recipe_id, image=recipe.image.name
+    ).update(thumbnail=recipe.thumbnail.name)
+    if not updated:
+        delete_orphan_files((recipe.thumbnail.name,))
+
+
+def run_thumbnail_task(recipe_id):
+    try:
+        make_thumbnail(recipe_id)
+    except Exception:
+        logger.exception("Не удалось создать миниатюру рецепта %s", recipe_id)
+    finally:
+        connection.close()
+
+
+def schedule_thumbnail(recipe_id):
+    """
+    Функция постановки создания уменьшенной копии в очередь
+    после фиксации транзакции. При THUMBNAIL_WORKERS = 0
+    копия создается сразу в текущем потоке.
+    """
+    if settings.THUMBNAIL_WORKERS:
+        on_commit(lambda: executor.submit(run_thumbnail_task, recipe_id))
+    else:
+        on_commit(lambda: make_thumbnail(recipe_id))
+
+
+def get_recipe_files(recipe):
+    return [file.name for file in (recipe.image, recipe.thumbnail) if file]
+
+
+def get_orphan_threshold(min_age=None):
+    if min_age is None:
+        min_age = settings.ORPHAN_FILE_MIN_AGE
+    return timezone.now() - timedelta(seconds=min_age)
+
+
+def delete_orphan_files(names):
+    """
+    Функция удаления файлов изображений, на которые
+    больше не ссылается ни один рецепт.
+    Файл с тем же содержимым мог быть только что загружен для другого
+    рецепта, поэтому файлы моложе ORPHAN_FILE_MIN_AGE не удаляются,
+    их удалит команда cleanup_recipe_images.
+    """
+    storage = Recipe._meta.get_field("image").storage
+    threshold = get_orphan_threshold()
+    for name in set(names):
+        in_use = Recipe.objects.filter(Q(image=name) | Q(thumbnail=name))
+        if in_use.exists() or not storage.exists(name):
+            continue
+        if storage.get_modified_time(name) <= threshold:
+            storage.delete(name)
+
+
+def release_files(names):
+    """
+    Функция освобождения файлов рецепта после фиксации транзакции.
+    Файлы с одинаковым содержимым общие для рецептов,
+    поэтому удаляются только неиспользуемые.
+    """
+    names = list(names)
+    if names:
+        on_commit(lambda: delete_orphan_files(names))
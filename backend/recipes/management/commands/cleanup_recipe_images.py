@@ -0,0 +1,56 @@
+import posixpath
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.images import get_orphan_threshold
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет файлы изображений рецептов, на которые не ссылается "
+        "ни один рецепт. Недавно загруженные файлы не удаляются, "
+        "так как рецепт с ними может быть еще не сохранен."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=settings.ORPHAN_FILE_MIN_AGE,
+            help="Минимальный возраст удаляемого файла в секундах.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def walk(self, storage, path):
+        if not storage.exists(path):
+            return
+        directories, files = storage.listdir(path)
+        for directory in directories:
+            yield from self.walk(storage, posixpath.join(path, directory))
+        for file in files:
+            yield posixpath.join(path, file)
+
+    def handle(self, *args, **options):
+        image_field = Recipe._meta.get_field("image")
+        storage = image_field.storage
+        referenced = set()
+        for image, thumbnail in Recipe.objects.values_list(
+            "image", "thumbnail"
+        ).iterator():
+            referenced.update((image, thumbnail))
+
+        threshold = get_orphan_threshold(options["min_age"])
+        deleted = 0
+        for name in self.walk(storage, image_field.upload_to.rstrip("/")):
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name) > threshold:
+                continue
+            if not options["dry_run"]:
+                storage.delete(name)
+            deleted += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Удалено неиспользуемых файлов: {deleted}.")
+        )
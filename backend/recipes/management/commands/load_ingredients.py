@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+from time import perf_counter
+
+from core.cache import bump_cache_version
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.transaction import atomic
+from recipes.models import Ingredient
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(settings.BASE_DIR), "data", "ingredients.csv"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает ингредиенты из csv или json файла. "
+        "Уже существующие пары (name, measurement_unit) пропускаются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    @staticmethod
+    def read_csv(file):
+        for row in csv.reader(file):
+            if row:
+                yield row[0].strip(), row[1].strip()
+
+    @staticmethod
+    def read_json(file):
+        for row in json.load(file):
+            yield row["name"].strip(), row["measurement_unit"].strip()
+
+    def read_rows(self, file, path):
+        if path.endswith(".json"):
+            return self.read_json(file)
+        if path.endswith(".csv"):
+            return self.read_csv(file)
+        raise CommandError("Поддерживаются только файлы csv и json.")
+
+    @staticmethod
+    def unique_rows(rows):
+        existing = set(
+            Ingredient.objects.values_list("name", "measurement_unit")
+        )
+        for row in rows:
+            if row not in existing:
+                existing.add(row)
+                yield row
+
+    @staticmethod
+    def copy_batch(batch):
+        """Метод вставки строк командой COPY, доступен в PostgreSQL."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} (name, measurement_unit) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    @staticmethod
+    def bulk_create_batch(batch):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in batch
+        )
+
+    @atomic
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден.")
+
+        if connection.vendor == "postgresql":
+            insert_batch = self.copy_batch
+        else:
+            insert_batch = self.bulk_create_batch
+
+        start = perf_counter()
+        created = 0
+        with open(path, encoding="utf-8") as file:
+            rows = self.unique_rows(self.read_rows(file, path))
+            while True:
+                batch = list(islice(rows, options["batch_size"]))
+                if not batch:
+                    break
+                insert_batch(batch)
+                created += len(batch)
+        elapsed = perf_counter() - start
+
+        if created:
+            bump_cache_version(Ingredient._meta.label_lower)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Загружено ингредиентов: {created} за {elapsed:.3f} с "
+                f"({created / elapsed:.0f} строк/с)."
+            )
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from recipes.images import make_thumbnail
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает уменьшенные копии изображений рецептов, у которых их нет. "
+        "Предназначена для заполнения миниатюр уже загруженных рецептов."
+    )
+
+    def handle(self, *args, **options):
+        recipe_ids = (
+            Recipe.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .filter(thumbnail__isnull=True)
+            .values_list("id", flat=True)
+        )
+        created = 0
+        for recipe_id in recipe_ids.iterator():
+            make_thumbnail(recipe_id)
+            created += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Созданы миниатюры рецептов: {created}.")
+        )
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.transaction import atomic
+from recipes.models import Favorite, Recipe
+from users.models import Follow
+
+User = get_user_model()
+
+
+def count_subquery(queryset, field):
+    """Функция подзапроса количества строк queryset для OuterRef("pk")."""
+    subquery = (
+        queryset.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счетчики избранного и корзин у рецептов, "
+        "подписчиков и рецептов у пользователей."
+    )
+
+    @atomic
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.update(
+            favorites_count=count_subquery(Favorite.objects, "recipe"),
+            shopping_carts_count=count_subquery(
+                Recipe.shopping_cart.through.objects, "recipe"
+            ),
+        )
+        users = User.objects.update(
+            followers_count=count_subquery(Follow.objects, "following"),
+            recipes_count=count_subquery(Recipe.objects, "author"),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пересчитаны счетчики рецептов: {recipes}, "
+                f"пользователей: {users}."
+            )
+        )
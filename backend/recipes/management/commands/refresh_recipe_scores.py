@@ -0,0 +1,52 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.transaction import atomic
+from django.utils import timezone
+from recipes.models import Recipe, RecipeScore
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает рейтинги рецептов по счетчикам избранного и корзин "
+        "с учетом возраста рецептов. Предназначена для периодического "
+        "запуска, между запусками рейтинги обновляются инкрементально."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    @atomic
+    def handle(self, *args, **options):
+        now = timezone.now()
+        existing = set(RecipeScore.objects.values_list("recipe", flat=True))
+        rows = Recipe.objects.values_list(
+            "id", "pub_date", "favorites_count", "shopping_carts_count"
+        ).iterator()
+
+        refreshed = 0
+        while True:
+            batch = list(islice(rows, options["batch_size"]))
+            if not batch:
+                break
+            scores = []
+            for id, pub_date, favorites_count, carts_count in batch:
+                popular = RecipeScore.get_popular(favorites_count, carts_count)
+                trending = popular * RecipeScore.get_decay(pub_date, now)
+                scores.append(
+                    RecipeScore(
+                        recipe_id=id, popular=popular, trending=trending
+                    )
+                )
+            RecipeScore.objects.bulk_update(
+                [score for score in scores if score.recipe_id in existing],
+                ("popular", "trending"),
+            )
+            RecipeScore.objects.bulk_create(
+                score for score in scores if score.recipe_id not in existing
+            )
+            refreshed += len(scores)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитаны рейтинги рецептов: {refreshed}.")
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.18 on 2026-10-18 06:13
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field):
+    subquery = (
+        queryset.filter(**{field: models.OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=models.Count('pk'))
+        .values('count')
+    )
+    return Coalesce(
+        models.Subquery(subquery, output_field=models.IntegerField()), 0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShopingCart = apps.get_model('payments', 'ShopingCart')
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite.objects, 'recipe'),
+        shopping_carts_count=count_subquery(
+            ShopingCart.recipes.through.objects, 'recipe'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_alter_cartingredient_cart'),
+        ('recipes', '0013_auto_20261018_0612'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='shopping_carts_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.18 on 2026-10-18 06:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def fill_scores(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeScore = apps.get_model('recipes', 'RecipeScore')
+    now = timezone.now()
+    scores = []
+    for id, pub_date, favorites_count, carts_count in (
+        Recipe.objects.values_list(
+            'id', 'pub_date', 'favorites_count', 'shopping_carts_count'
+        ).iterator()
+    ):
+        popular = (
+            favorites_count * settings.FAVORITE_SCORE_WEIGHT
+            + carts_count * settings.SHOPPING_CART_SCORE_WEIGHT
+        )
+        age_hours = max((now - pub_date).total_seconds() / 3600, 0)
+        trending = popular / (age_hours + 2) ** settings.TRENDING_GRAVITY
+        scores.append(
+            RecipeScore(recipe_id=id, popular=popular, trending=trending)
+        )
+    RecipeScore.objects.bulk_create(scores, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_auto_20261018_0613'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipes.recipe')),
+                ('popular', models.FloatField(default=0)),
+                ('trending', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-popular', '-recipe'], name='recipe_score_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-trending', '-recipe'], name='recipe_score_trending_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.18 on 2026-10-18 06:20
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_recipe_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to='recipes/'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='recipes/thumbnails/'),
+        ),
+    ]
@@ -1,8 +1,10 @@
-from core.models.mixins import UpdateMixin
+from core.models.mixins import CounterMixin, UpdateMixin
+from core.storage import ContentAddressedStorage
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -28,14 +30,23 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(UpdateMixin, models.Model):
+class Recipe(CounterMixin, UpdateMixin, models.Model):
     """Модель рецептов."""
 
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="recipes"
+        User, on_delete=models.CASCADE, related_name="recipes", db_index=False
     )
     name = models.CharField(max_length=100)
-    image = models.ImageField(upload_to="recipes/", null=True)
+    image = models.ImageField(
+        upload_to="recipes/", storage=ContentAddressedStorage(), null=True
+    )
+    thumbnail = models.ImageField(
+        upload_to="recipes/thumbnails/",
+        storage=ContentAddressedStorage(),
+        null=True,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField()
     cooking_time = models.SmallIntegerField(
         validators=(MinValueValidator(settings.MIN_VALUE_COOKING_TIME),),
@@ -46,9 +57,20 @@ class Recipe(UpdateMixin, models.Model):
     )
     pub_date = models.DateTimeField(auto_now_add=True)
     tags = models.ManyToManyField(Tag, related_name="recipes")
+    favorites_count = models.PositiveIntegerField(default=0)
+    shopping_carts_count = models.PositiveIntegerField(default=0)
 
     class Meta:
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
+        indexes = (
+            models.Index(
+                fields=("-pub_date", "-id"), name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=("author", "-pub_date", "-id"),
+                name="recipe_author_pub_date_id_idx",
+            ),
+        )
         constraints = (
             models.CheckConstraint(
                 check=models.Q(
@@ -71,11 +93,20 @@ class AmountIngredient(models.Model):
         default=settings.MIN_VALUE_AMOUNT,
     )
     recipe = models.ForeignKey(
-        Recipe, on_delete=models.CASCADE, related_name="ingredients"
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="ingredients",
+        db_index=False,
     )
     ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=("recipe", "ingredient"),
+                name="amount_recipe_ingredient_idx",
+            ),
+        )
         constraints = (
             models.CheckConstraint(
                 check=models.Q(amount__gte=settings.MIN_VALUE_AMOUNT),
@@ -94,18 +125,97 @@ class Favorite(models.Model):
     """Модель избранных рецептов конкретного пользователя."""
 
     recipe = models.ForeignKey(
-        Recipe, on_delete=models.CASCADE, related_name="favorites"
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="favorites",
+        db_index=False,
     )
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="favorites"
+        User,
+        on_delete=models.CASCADE,
+        related_name="favorites",
+        db_index=False,
     )
 
     def __str__(self) -> str:
         return f"{self.user.get_full_name()} {self.recipe.name}"
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=("user", "recipe"), name="favorite_user_recipe_idx"
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=("recipe", "user"), name="unique_recipe_user"
             ),
         )
+
+
+class RecipeScore(models.Model):
+    """
+    Модель рейтинга рецепта для сортировки по популярности.
+    popular - взвешенная сумма добавлений в избранное и корзины,
+    trending - та же сумма, затухающая с возрастом рецепта.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="score",
+    )
+    popular = models.FloatField(default=0)
+    trending = models.FloatField(default=0)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=("-popular", "-recipe"), name="recipe_score_popular_idx"
+            ),
+            models.Index(
+                fields=("-trending", "-recipe"),
+                name="recipe_score_trending_idx",
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.recipe_id} {self.popular} {self.trending}"
+
+    @staticmethod
+    def get_decay(pub_date, now=None) -> float:
+        age_hours = ((now or timezone.now()) - pub_date).total_seconds() / 3600
+        return 1 / (max(age_hours, 0) + 2) ** settings.TRENDING_GRAVITY
+
+    @staticmethod
+    def get_popular(favorites_count, shopping_carts_count) -> float:
+        return (
+            favorites_count * settings.FAVORITE_SCORE_WEIGHT
+            + shopping_carts_count * settings.SHOPPING_CART_SCORE_WEIGHT
+        )
+
+    @classmethod
+    def change_scores(cls, recipes, weight):
+        """
+        Метод изменения рейтинга рецептов на вес одного действия.
+        Прибавка к trending учитывает текущий возраст рецепта.
+        """
+        recipes = list(recipes)
+        if not recipes:
+            return
+        now = timezone.now()
+        cls.objects.filter(recipe__in=recipes).update(
+            popular=models.F("popular") + weight,
+            trending=models.F("trending")
+            + models.Case(
+                *(
+                    models.When(
+                        recipe=recipe,
+                        then=weight * cls.get_decay(recipe.pub_date, now),
+                    )
+                    for recipe in recipes
+                ),
+                output_field=models.FloatField(),
+            ),
+        )
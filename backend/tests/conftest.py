@@ -0,0 +1,90 @@
+import pytest
+from django.core.cache import cache
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(autouse=True)
+def media_and_cache(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.THUMBNAIL_WORKERS = 0
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username="user",
+        email="user@example.com",
+        password="Pass12345xx",
+        first_name="Имя",
+        last_name="Фамилия",
+    )
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        username="author",
+        email="author@example.com",
+        password="Pass12345xx",
+        first_name="Автор",
+        last_name="Рецептов",
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def tags():
+    return [
+        Tag.objects.create(
+            name=f"Тег {number}", color=f"#00000{number}", slug=f"tag{number}"
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients():
+    return [
+        Ingredient.objects.create(
+            name=f"Ингредиент {number}", measurement_unit="г"
+        )
+        for number in range(10)
+    ]
+
+
+@pytest.fixture
+def make_recipes(author, tags, ingredients):
+    def make_recipes(count, ingredients_count=5, recipe_author=None):
+        recipes = []
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                author=recipe_author or author,
+                name=f"Рецепт {number}",
+                text="Описание рецепта.",
+                cooking_time=number + 1,
+            )
+            recipe.tags.set(tags[: number % len(tags) + 1])
+            AmountIngredient.objects.bulk_create(
+                AmountIngredient(
+                    recipe=recipe,
+                    ingredient=ingredients[
+                        (number + offset) % len(ingredients)
+                    ],
+                    amount=offset + 1,
+                )
+                for offset in range(ingredients_count)
+            )
+            recipes.append(recipe)
+        return recipes
+
+    return make_recipes
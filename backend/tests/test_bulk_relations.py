@@ -0,0 +1,31 @@
+import pytest
+from recipes.models import Recipe
+
+BULK_URLS = (
+    ("/api/recipes/favorite/", "favorites_count"),
+    ("/api/recipes/shopping_cart/", "shopping_carts_count"),
+)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url, counter", BULK_URLS)
+def test_repeated_bulk_requests_create_and_count_relations_once(
+    user_client, make_recipes, url, counter
+):
+    first, second = make_recipes(2)
+    ids = [first.id, second.id, first.id, 999]
+
+    responses = [
+        user_client.post(url, {"ids": ids}, format="json") for _ in range(2)
+    ]
+
+    assert [
+        [result["status"] for result in response.data["results"]]
+        for response in responses
+    ] == [
+        ["created", "created", "not_found"],
+        ["exists", "exists", "not_found"],
+    ]
+    assert list(
+        Recipe.objects.order_by("id").values_list(counter, flat=True)
+    ) == [1, 1]
@@ -0,0 +1,15 @@
+import pytest
+from rest_framework.test import APIClient
+
+TAGS_URL = "/api/tags/"
+
+
+@pytest.mark.django_db
+def test_cached_list_depends_on_accepted_media_type(tags):
+    client = APIClient()
+    indented = client.get(TAGS_URL, HTTP_ACCEPT="application/json; indent=4")
+    compact = client.get(TAGS_URL, HTTP_ACCEPT="application/json")
+
+    assert b"\n    " in indented.content
+    assert b"\n" not in compact.content
+    assert indented["ETag"] != compact["ETag"]
@@ -0,0 +1,67 @@
+import pytest
+from payments.models import ShopingCart
+from recipes.models import Favorite
+from users.models import Follow, User
+
+
+def get_counter(obj, field):
+    return type(obj).objects.values_list(field, flat=True).get(pk=obj.pk)
+
+
+def get_cart_counters(*recipes):
+    return [
+        get_counter(recipe, "shopping_carts_count") for recipe in recipes
+    ]
+
+
+@pytest.mark.django_db
+def test_follow_created_outside_api_can_be_deleted_via_api(
+    user, author, user_client
+):
+    Follow.objects.create(follower=user, following=author)
+    assert get_counter(author, "followers_count") == 1
+
+    response = user_client.delete(f"/api/users/{author.id}/subscribe/")
+
+    assert response.status_code == 204
+    assert get_counter(author, "followers_count") == 0
+
+
+@pytest.mark.django_db
+def test_counters_follow_orm_writes_and_cascades(user, author, make_recipes):
+    recipe, other = make_recipes(2)
+    assert get_counter(author, "recipes_count") == 2
+    Favorite.objects.create(user=user, recipe=recipe)
+    assert get_counter(recipe, "favorites_count") == 1
+
+    user.delete()
+
+    assert get_counter(recipe, "favorites_count") == 0
+    other.delete()
+    assert get_counter(author, "recipes_count") == 1
+
+
+@pytest.mark.django_db
+def test_shopping_cart_counters_follow_related_managers(
+    user, author, make_recipes
+):
+    first, second, third = make_recipes(3)
+    cart = ShopingCart.objects.create(user=user)
+
+    cart.recipes.add(first, second)
+    second.shopping_cart.add(ShopingCart.objects.create(user=author), cart)
+    assert get_cart_counters(first, second, third) == [1, 2, 0]
+
+    cart.recipes.set((second, third))
+    assert get_cart_counters(first, second, third) == [0, 2, 1]
+
+    second.shopping_cart.clear()
+    cart.delete()
+    assert get_cart_counters(first, second, third) == [0, 0, 0]
+
+
+@pytest.mark.django_db
+def test_counters_do_not_drop_below_zero(author):
+    User.change_counters((author.id,), followers_count=-1)
+
+    assert get_counter(author, "followers_count") == 0
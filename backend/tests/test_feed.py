@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from users.models import Follow
+
+FEED_URL = "/api/recipes/feed/"
+
+
+def get_feed_ids(client):
+    return [recipe["id"] for recipe in client.get(FEED_URL).data["results"]]
+
+
+@pytest.mark.django_db
+def test_author_changes_refresh_cached_feed_without_follower_fan_out(
+    settings,
+    user,
+    author,
+    user_client,
+    make_recipes,
+    django_user_model,
+    django_capture_on_commit_callbacks,
+):
+    settings.FEED_CACHE_TIMEOUT = 60
+    kept, deleted = make_recipes(2)
+    Follow.objects.create(follower=user, following=author)
+    for number in range(5):
+        follower = django_user_model.objects.create_user(
+            username=f"follower{number}",
+            email=f"follower{number}@example.com",
+            password="Pass12345xx",
+        )
+        Follow.objects.create(follower=follower, following=author)
+    assert get_feed_ids(user_client) == [deleted.id, kept.id]
+    with CaptureQueriesContext(connection) as context:
+        assert get_feed_ids(user_client) == [deleted.id, kept.id]
+    assert not any(
+        '"recipes_recipe"' in query["sql"]
+        for query in context.captured_queries
+    )
+
+    author_client = APIClient()
+    author_client.force_authenticate(author)
+    with CaptureQueriesContext(connection) as context:
+        with django_capture_on_commit_callbacks(execute=True):
+            response = author_client.delete(f"/api/recipes/{deleted.id}/")
+    assert response.status_code == 204
+    assert not any(
+        '"users_follow"' in query["sql"]
+        and query["sql"].startswith("SELECT")
+        for query in context.captured_queries
+    )
+
+    assert get_feed_ids(user_client) == [kept.id]
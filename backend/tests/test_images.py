@@ -0,0 +1,50 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from recipes.images import delete_orphan_files
+from recipes.models import Recipe
+
+DAY_AGO = (datetime.now() - timedelta(days=1)).timestamp()
+
+
+@pytest.fixture
+def storage():
+    return Recipe._meta.get_field("image").storage
+
+
+def make_old(storage, name):
+    os.utime(storage.path(name), (DAY_AGO, DAY_AGO))
+
+
+def test_saving_existing_content_refreshes_modified_time(storage):
+    name = storage.save("recipes/image.png", ContentFile(b"image"))
+    make_old(storage, name)
+
+    assert storage.save("recipes/copy.png", ContentFile(b"image")) == name
+    assert storage.get_modified_time(name) > datetime.fromtimestamp(DAY_AGO)
+
+
+@pytest.mark.django_db
+def test_delete_orphan_files_keeps_recently_saved_files(storage):
+    recent = storage.save("recipes/recent.png", ContentFile(b"recent"))
+    old = storage.save("recipes/old.png", ContentFile(b"old"))
+    make_old(storage, old)
+
+    delete_orphan_files((recent, old))
+
+    assert storage.exists(recent)
+    assert not storage.exists(old)
+
+
+@pytest.mark.django_db
+def test_delete_orphan_files_keeps_referenced_files(storage, make_recipes):
+    name = storage.save("recipes/used.png", ContentFile(b"used"))
+    make_old(storage, name)
+    (recipe,) = make_recipes(1)
+    Recipe.objects.filter(id=recipe.id).update(image=name)
+
+    delete_orphan_files((name,))
+
+    assert storage.exists(name)
@@ -0,0 +1,31 @@
+import re
+
+import pytest
+
+RECIPES_URL = "/api/recipes/"
+
+
+def get_timings(response):
+    return dict(
+        re.findall(r"(\w+);dur=([\d.]+)", response["Server-Timing"])
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fast_path", (False, True))
+def test_recipe_list_reports_serialization_time(
+    settings, user_client, make_recipes, fast_path
+):
+    settings.RECIPE_LIST_FAST_PATH = fast_path
+    make_recipes(6)
+
+    timings = get_timings(user_client.get(RECIPES_URL))
+
+    assert float(timings["serialize"]) > 0
+    assert {"db", "app", "render", "total"} <= timings.keys()
+    metrics = user_client.get("/metrics/").content.decode()
+    assert re.search(
+        r'foodgram_serialize_seconds_total\{view="RecipeViewSet.list",'
+        r'method="GET",status="200"\} [\d.e-]+',
+        metrics,
+    )
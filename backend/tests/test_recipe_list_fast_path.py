@@ -0,0 +1,74 @@
+import pytest
+from payments.models import ShopingCart
+from recipes.models import Favorite, Recipe, RecipeScore
+from rest_framework.test import APIClient
+from users.models import Follow
+
+RECIPES_URL = "/api/recipes/"
+QUERIES = (
+    {},
+    {"page": 2},
+    {"tags": ["tag0", "tag2"]},
+    {"is_favorited": 1},
+    {"is_in_shopping_cart": 1},
+    {"ordering": "popular"},
+    {"ordering": "popular", "tags": "tag1"},
+    {"ordering": "popular", "page": 2},
+)
+
+
+@pytest.fixture
+def recipes(user, author, make_recipes):
+    recipes = make_recipes(8)
+    for number, recipe in enumerate(recipes):
+        RecipeScore.objects.filter(recipe=recipe).update(
+            popular=number % 3, trending=number
+        )
+    Recipe.objects.filter(id=recipes[0].id).update(
+        image="recipes/aa/original.png",
+        thumbnail="recipes/thumbnails/aa/original.webp",
+    )
+    Recipe.objects.filter(id=recipes[1].id).update(
+        image="recipes/bb/legacy.png"
+    )
+    Follow.objects.create(follower=user, following=author)
+    Favorite.objects.create(user=user, recipe=recipes[1])
+    Favorite.objects.create(user=user, recipe=recipes[2])
+    cart = ShopingCart.objects.create(user=user)
+    cart.recipes.add(recipes[0], recipes[3])
+    return recipes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("authenticated", (False, True))
+@pytest.mark.parametrize("params", QUERIES)
+def test_fast_recipe_list_matches_serializer_output(
+    settings, recipes, user_client, authenticated, params
+):
+    client = user_client if authenticated else APIClient()
+
+    settings.RECIPE_LIST_FAST_PATH = False
+    expected = client.get(RECIPES_URL, params)
+    settings.RECIPE_LIST_FAST_PATH = True
+    response = client.get(RECIPES_URL, params)
+
+    assert response.status_code == expected.status_code == 200
+    assert response.content == expected.content
+
+
+@pytest.mark.django_db
+def test_fast_recipe_list_prefers_thumbnail(settings, recipes, user_client):
+    settings.RECIPE_LIST_FAST_PATH = True
+    images = {
+        recipe["id"]: recipe["image"]
+        for page in (1, 2)
+        for recipe in user_client.get(RECIPES_URL, {"page": page}).data[
+            "results"
+        ]
+    }
+
+    assert images[recipes[0].id].endswith(
+        "/media/recipes/thumbnails/aa/original.webp"
+    )
+    assert images[recipes[1].id].endswith("/media/recipes/bb/legacy.png")
+    assert images[recipes[2].id] is None
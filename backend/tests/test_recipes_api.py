@@ -0,0 +1,103 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from recipes.models import RecipeScore
+
+RECIPES_URL = "/api/recipes/"
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_recipe_list_queries_do_not_depend_on_page_size(
+    user_client, make_recipes
+):
+    make_recipes(1, ingredients_count=5)
+    one_recipe_queries = count_queries(user_client, RECIPES_URL)
+
+    make_recipes(5, ingredients_count=5)
+    assert len(user_client.get(RECIPES_URL).data["results"]) == 6
+    six_recipes_queries = count_queries(user_client, RECIPES_URL)
+
+    assert one_recipe_queries == six_recipes_queries
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ordering", ("popular", "trending"))
+def test_ranked_ordering_pages_by_score_with_cursor(
+    user_client, make_recipes, ordering
+):
+    recipes = make_recipes(9)
+    scores = (3, 1, 3, 0, 2, 1, 3, 0, 2)
+    for recipe, score in zip(recipes, scores):
+        RecipeScore.objects.filter(recipe=recipe).update(
+            popular=score, trending=score
+        )
+    expected = [
+        recipe.id
+        for recipe, _ in sorted(
+            zip(recipes, scores),
+            key=lambda pair: (pair[1], pair[0].id),
+            reverse=True,
+        )
+    ]
+
+    response = user_client.get(RECIPES_URL, {"ordering": ordering})
+    assert [recipe["id"] for recipe in response.data["results"]] == (
+        expected[:6]
+    )
+
+    ids = []
+    response = user_client.get(
+        RECIPES_URL, {"ordering": ordering, "cursor": ""}
+    )
+    while True:
+        ids.extend(recipe["id"] for recipe in response.data["results"])
+        if response.data["next"] is None:
+            break
+        response = user_client.get(response.data["next"])
+    assert ids == expected
+
+
+def make_image_payload(tags, ingredients, image):
+    return {
+        "name": "Рецепт",
+        "text": "Описание рецепта.",
+        "cooking_time": 10,
+        "image": image,
+        "tags": [tags[0].id],
+        "ingredients": [{"id": ingredients[0].id, "amount": 10}],
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "encoded, status_code",
+    (
+        (lambda png: base64.encodebytes(png).decode(), 201),
+        (lambda png: base64.b64encode(png).decode()[:-4] + "*!@#", 400),
+    ),
+)
+def test_recipe_image_base64_decoding(
+    user_client, tags, ingredients, encoded, status_code
+):
+    buffer = BytesIO()
+    Image.effect_noise((64, 64), 64).save(buffer, "PNG")
+    image = "data:image/png;base64," + encoded(buffer.getvalue())
+
+    response = user_client.post(
+        RECIPES_URL,
+        make_image_payload(tags, ingredients, image),
+        format="json",
+    )
+
+    assert response.status_code == status_code
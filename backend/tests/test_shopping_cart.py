@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from payments.models import CartIngredient, ShopingCart
+
+CART_SIZE = 300
+ADD_QUERIES = 9
+REMOVE_QUERIES = 8
+
+
+def cart_url(recipe):
+    return f"/api/recipes/{recipe.id}/shopping_cart/"
+
+
+def count_queries(request):
+    """
+    Функция подсчета SQL-запросов без SAVEPOINT и RELEASE SAVEPOINT:
+    их количество зависит от того, выполняется ли тест в транзакции.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = request()
+    queries = [
+        query["sql"]
+        for query in context.captured_queries
+        if "SAVEPOINT" not in query["sql"]
+    ]
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+def test_cart_add_and_remove_queries_do_not_depend_on_cart_size(
+    user, user_client, make_recipes
+):
+    recipe, *carted = make_recipes(CART_SIZE + 1, ingredients_count=3)
+    cart = ShopingCart.objects.create(user=user)
+    cart.recipes.add(*carted)
+    CartIngredient.objects.refresh((cart,))
+
+    response, add_queries = count_queries(
+        lambda: user_client.post(cart_url(recipe))
+    )
+    assert response.status_code == 201
+    assert add_queries == ADD_QUERIES
+
+    response, remove_queries = count_queries(
+        lambda: user_client.delete(cart_url(recipe))
+    )
+    assert response.status_code == 204
+    assert remove_queries == REMOVE_QUERIES
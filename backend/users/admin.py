@@ -9,8 +9,11 @@ class UserAdmin(admin.ModelAdmin):
         "first_name",
         "last_name",
         "email",
+        "followers_count",
+        "recipes_count",
     )
     list_filter = ("first_name", "email")
+    readonly_fields = ("followers_count", "recipes_count")
     empty_value_display = "-пусто-"
 
 
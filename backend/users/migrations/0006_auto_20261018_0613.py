@@ -0,0 +1,49 @@
+# Generated by Django 3.2.18 on 2026-10-18 06:13
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(queryset, field):
+    subquery = (
+        queryset.filter(**{field: models.OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=models.Count('pk'))
+        .values('count')
+    )
+    return Coalesce(
+        models.Subquery(subquery, output_field=models.IntegerField()), 0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('users', 'Follow')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    User.objects.update(
+        followers_count=count_subquery(Follow.objects, 'following'),
+        recipes_count=count_subquery(Recipe.objects, 'author'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_auto_20261018_0613'),
+        ('users', '0005_auto_20261018_0611'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,24 +1,36 @@
+from core.models.mixins import CounterMixin
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 
-class User(AbstractUser):
+class User(CounterMixin, AbstractUser):
     """Модель пользователей."""
 
     email = models.EmailField(max_length=254, unique=True)
+    followers_count = models.PositiveIntegerField(default=0)
+    recipes_count = models.PositiveIntegerField(default=0)
 
 
 class Follow(models.Model):
     """Модель подписок."""
 
     follower = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="follows"
+        User, on_delete=models.CASCADE, related_name="follows", db_index=False
     )
     following = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="followers"
+        User,
+        on_delete=models.CASCADE,
+        related_name="followers",
+        db_index=False,
     )
 
     class Meta:
+        indexes = (
+            models.Index(
+                fields=("following", "follower"),
+                name="follow_following_follower_idx",
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=("follower", "following"), name="unique_follow"